@@ -4,7 +4,9 @@ from setuptools import setup
 
 
 if __name__ == '__main__':
-    extra_requires = {}
+    extra_requires = {
+        'numpy': ['numpy'],
+    }
 
     all_packages = []
     for values in extra_requires.values():
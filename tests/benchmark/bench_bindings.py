@@ -0,0 +1,174 @@
+"""Benchmark the binding pipeline: generation, API pass, import time, memory and call overhead
+
+Everything runs offline, the synthetic headers are compiled into a stub library
+so the generated modules can be imported and called.
+
+Usage::
+
+    python tests/benchmark/bench_bindings.py --output bench_bindings.json
+
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+from tide.generators.api_pass import APIPass
+from tide.generators.binding_generator import BindingGenerator, sdl2_epilogue, write_bindings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import SyntheticConfig, write_header
+
+
+def build_library(folder, prefix):
+    """Compile the stub library, returns None if no compiler is available"""
+    compiler = os.getenv('CC') or shutil.which('cc') or shutil.which('gcc') or shutil.which('clang')
+    if compiler is None:
+        return None
+
+    source_file = os.path.join(folder, f'{prefix}.c')
+    library = os.path.join(folder, f'lib{prefix}.so')
+
+    subprocess.run([compiler, '-shared', '-fPIC', '-O2', '-o', library, source_file], check=True)
+    return library
+
+
+def prelude(folder, prefix, lazy=False):
+    if lazy:
+        return (
+            'from tide.runtime.loader import DLL\n'
+            'from tide.runtime.ctypes_ext import *\n'
+            f'_lib = DLL("{prefix}", ["{prefix}"], {folder!r}, lazy=True)\n'
+            '_bind = _lib.lazy_binder(globals())\n'
+        )
+
+    return (
+        'from tide.runtime.loader import DLL\n'
+        'from tide.runtime.ctypes_ext import *\n'
+        f'_lib = DLL("{prefix}", ["{prefix}"], {folder!r}, bulk=True)\n'
+        '_bind = _lib.bind_function\n'
+    )
+
+
+# executed in a fresh interpreter so import time and memory are not polluted by the generator
+IMPORT_PROBE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {folder!r})
+
+import tide.runtime.loader
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+rss_before = rss_kb()
+start = time.perf_counter()
+import {module} as bindings
+import_time = time.perf_counter() - start
+rss_after = rss_kb()
+
+fun = bindings.{noop}
+fun()
+
+calls = {calls}
+start = time.perf_counter()
+for _ in range(calls):
+    bindings.{noop}()
+call_time = (time.perf_counter() - start) / calls
+
+print(json.dumps(dict(import_s=import_time, rss_kb=rss_after, import_rss_kb=rss_after - rss_before, call_ns=call_time * 1e9)))
+"""
+
+
+def probe_import(folder, module, noop, calls=100000):
+    code = IMPORT_PROBE.format(root=ROOT, folder=folder, module=module, noop=noop, calls=calls)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def timed(fun, *args, **kwargs):
+    start = time.perf_counter()
+    result = fun(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_header(header, guard=None):
+    """Time the generation of the bindings of a header and the API pass over them"""
+    module, generation = timed(BindingGenerator.run, header, guard=guard)
+    statements = len(module.body)
+    _, api = timed(APIPass().generate, module)
+    return module, dict(generation_s=generation, api_pass_s=api, statements=statements)
+
+
+def bench_synthetic(folder, config: SyntheticConfig, calls):
+    prefix = config.prefix.lower()
+    header_file = write_header(config, folder)
+
+    module, result = timed(BindingGenerator.run, header_file, guard=header_file)
+    result = dict(generation_s=result, statements=len(module.body))
+
+    for lazy in (False, True):
+        name = f'{prefix}_{"lazy" if lazy else "eager"}'
+        write_bindings(
+            module.body,
+            os.path.join(folder, f'{name}.py'),
+            prelude=prelude(folder, prefix, lazy),
+            epilogue=sdl2_epilogue(lazy))
+
+    _, result['api_pass_s'] = timed(APIPass().generate, module)
+
+    if build_library(folder, prefix) is None:
+        result['skipped'] = 'no C compiler to build the stub library'
+        return result
+
+    noop = f'{config.prefix}_Noop'
+    result['eager'] = probe_import(folder, f'{prefix}_eager', noop, calls)
+    result['lazy'] = probe_import(folder, f'{prefix}_lazy', noop, calls)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default='bench_bindings.json', help='JSON file the results are written to')
+    parser.add_argument('--scales', default='0.1,1,10', help='size of the synthetic headers relative to SDL2')
+    parser.add_argument('--calls', default=100000, type=int, help='number of calls used to measure call overhead')
+    args = parser.parse_args(argv)
+
+    results = dict(
+        python=sys.version,
+        platform=platform.platform(),
+        time=time.time(),
+        headers=dict(),
+        synthetic=dict(),
+    )
+
+    for header in sorted(glob.glob(os.path.join(ROOT, 'tests', 'binding', '*.h'))):
+        _, results['headers'][os.path.basename(header)] = bench_header(header)
+
+    for scale in args.scales.split(','):
+        config = SyntheticConfig().scaled(float(scale))
+
+        with tempfile.TemporaryDirectory() as folder:
+            results['synthetic'][scale] = bench_synthetic(folder, config, calls=args.calls)
+
+        print(f'{scale:>6}x: {json.dumps(results["synthetic"][scale])}')
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Generate synthetic C headers of arbitrary size to profile the binding pipeline
+
+The headers only use the C standard library so they can be generated and parsed without SDL2.
+A C source implementing every function is generated alongside the header,
+it can be compiled into a stub library to import and call the generated bindings.
+
+Usage::
+
+    python tests/benchmark/synthetic.py --scale 10 --output /tmp/synthetic
+
+"""
+import argparse
+from dataclasses import dataclass, fields
+import os
+import tempfile
+from typing import Tuple
+
+
+@dataclass
+class SyntheticConfig:
+    """Size of the generated header, the defaults are roughly the size of SDL2"""
+    structs: int = 100
+    unions: int = 2             # nested unions per struct
+    union_depth: int = 2        # nesting depth of each union
+    enums: int = 60
+    enum_values: int = 10
+    macros: int = 120           # object-like macros chains
+    macro_chain: int = 4        # number of macros in each dependency chain
+    function_macros: int = 40
+    typedefs: int = 50          # typedef chains
+    typedef_chain: int = 3      # number of typedefs in each chain
+    functions: int = 800
+    prefix: str = 'Syn'
+
+    def scaled(self, scale: float) -> 'SyntheticConfig':
+        """Returns a config multiplying the number of declarations by scale
+
+        Examples
+        --------
+        >>> SyntheticConfig().scaled(10).functions
+        8000
+        >>> SyntheticConfig().scaled(10).macro_chain
+        4
+        """
+        counts = ('structs', 'enums', 'macros', 'function_macros', 'typedefs', 'functions')
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+
+        for name in counts:
+            values[name] = max(int(values[name] * scale), 1)
+
+        return SyntheticConfig(**values)
+
+
+def union_declaration(name, depth, indent=1):
+    spaces = '    ' * indent
+
+    if depth <= 1:
+        return f'{spaces}union {name} {{ int i; float f; char c[4]; }}'
+
+    inner = union_declaration(f'{name}_{depth}', depth - 1, indent + 1)
+    return f'{spaces}union {name} {{\n{spaces}    int i;\n{spaces}    float f;\n{inner} inner;\n{spaces}}}'
+
+
+def generate_header(config: SyntheticConfig) -> Tuple[str, str]:
+    """Returns a C header and a C source implementing its functions
+
+    Examples
+    --------
+    >>> header, source = generate_header(SyntheticConfig(
+    ...     structs=1, unions=1, union_depth=2, enums=1, enum_values=2, macros=1, macro_chain=2,
+    ...     function_macros=1, typedefs=1, typedef_chain=2, functions=1))
+    >>> print(header)
+    #ifndef SYN_SYNTHETIC_H
+    #define SYN_SYNTHETIC_H
+    <BLANKLINE>
+    typedef int Syn_Int0_0;
+    typedef Syn_Int0_0 Syn_Int0_1;
+    <BLANKLINE>
+    typedef enum Syn_Kind0 { SYN_KIND0_VALUE0, SYN_KIND0_VALUE1 } Syn_Kind0;
+    <BLANKLINE>
+    #define SYN_FLAG0_0 (1 << 0)
+    #define SYN_FLAG0_1 (SYN_FLAG0_0 | 2)
+    #define SYN_SCALE0(x) ((x) * SYN_FLAG0_1)
+    <BLANKLINE>
+    typedef struct Syn_Object0 {
+        int id;
+        union Syn_Value0_0 {
+            int i;
+            float f;
+            union Syn_Value0_0_2 { int i; float f; char c[4]; } inner;
+        } value0;
+        Syn_Kind0 kind;
+        Syn_Int0_1 count;
+    } Syn_Object0;
+    <BLANKLINE>
+    Syn_Object0 *Syn_CreateObject0(void);
+    Syn_Int0_1 Syn_Fun0(Syn_Object0 *self, Syn_Int0_1 a);
+    int Syn_Noop(void);
+    <BLANKLINE>
+    #endif
+    <BLANKLINE>
+    """
+    p = config.prefix
+    P = config.prefix.upper()
+
+    header = [f'#ifndef {P}_SYNTHETIC_H', f'#define {P}_SYNTHETIC_H', '']
+    source = ['#include <stdlib.h>', f'#include "{p.lower()}.h"', '']
+
+    # Typedef chains
+    for i in range(config.typedefs):
+        previous = 'int'
+        for j in range(config.typedef_chain):
+            header.append(f'typedef {previous} {p}_Int{i}_{j};')
+            previous = f'{p}_Int{i}_{j}'
+    header.append('')
+
+    def int_type(i):
+        if config.typedefs == 0:
+            return 'int'
+        return f'{p}_Int{i % config.typedefs}_{config.typedef_chain - 1}'
+
+    # Enums
+    for i in range(config.enums):
+        values = ', '.join(f'{P}_KIND{i}_VALUE{j}' for j in range(config.enum_values))
+        header.append(f'typedef enum {p}_Kind{i} {{ {values} }} {p}_Kind{i};')
+    header.append('')
+
+    # Macros with dependency chains
+    for i in range(config.macros):
+        header.append(f'#define {P}_FLAG{i}_0 (1 << {i % 31})')
+
+        for j in range(1, config.macro_chain):
+            header.append(f'#define {P}_FLAG{i}_{j} ({P}_FLAG{i}_{j - 1} | {1 << (j % 31)})')
+
+    for i in range(config.function_macros):
+        if config.macros > 0:
+            header.append(f'#define {P}_SCALE{i}(x) ((x) * {P}_FLAG{i % config.macros}_{config.macro_chain - 1})')
+        else:
+            header.append(f'#define {P}_SCALE{i}(x) ((x) * {i + 1})')
+    header.append('')
+
+    # Structs with nested unions
+    for i in range(config.structs):
+        header.append(f'typedef struct {p}_Object{i} {{')
+        header.append('    int id;')
+
+        for j in range(config.unions):
+            header.append(f'{union_declaration(f"{p}_Value{i}_{j}", config.union_depth)} value{j};')
+
+        if config.enums > 0:
+            header.append(f'    {p}_Kind{i % config.enums} kind;')
+
+        header.append(f'    {int_type(i)} count;')
+        header.append(f'}} {p}_Object{i};')
+        header.append('')
+
+    # Functions, a constructor per struct and methods spread over the structs
+    for i in range(config.structs):
+        signature = f'{p}_Object{i} *{p}_CreateObject{i}(void)'
+        header.append(f'{signature};')
+        source.append(f'{signature} {{ return calloc(1, sizeof({p}_Object{i})); }}')
+
+    for i in range(config.functions):
+        rtype = int_type(i)
+
+        if config.structs > 0:
+            signature = f'{rtype} {p}_Fun{i}({p}_Object{i % config.structs} *self, {rtype} a)'
+        else:
+            signature = f'{rtype} {p}_Fun{i}({rtype} a)'
+
+        header.append(f'{signature};')
+        source.append(f'{signature} {{ return a; }}')
+
+    header.append(f'int {p}_Noop(void);')
+    source.append(f'int {p}_Noop(void) {{ return 0; }}')
+
+    header.extend(['', '#endif', ''])
+    source.append('')
+    return '\n'.join(header), '\n'.join(source)
+
+
+def write_header(config: SyntheticConfig, folder=None) -> str:
+    """Write the header and its implementation inside folder (a new temporary folder by default),
+    returns the path to the header
+    """
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix='tide_synthetic_')
+
+    os.makedirs(folder, exist_ok=True)
+    header, source = generate_header(config)
+
+    name = config.prefix.lower()
+    header_file = os.path.join(folder, f'{name}.h')
+
+    with open(header_file, 'w') as f:
+        f.write(header)
+
+    with open(os.path.join(folder, f'{name}.c'), 'w') as f:
+        f.write(source)
+
+    return header_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=None, help='folder the header is written to, defaults to a temporary folder')
+    parser.add_argument('--scale', default=1, type=float, help='multiply the number of declarations')
+
+    for f in fields(SyntheticConfig):
+        parser.add_argument(f'--{f.name.replace("_", "-")}', default=f.default, type=f.type)
+
+    args = parser.parse_args(argv)
+    config = SyntheticConfig(**{f.name: getattr(args, f.name) for f in fields(SyntheticConfig)})
+    print(write_header(config.scaled(args.scale), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,18 +2,19 @@ import ast
 from collections import defaultdict
 import copy
 import logging
+import multiprocessing
 import re
 from typing import List, Optional, Tuple
 
 import tide.generators.nodes as T
 from tide.generators.binding_generator import c_identifier
 from tide.generators.debug import d
-from tide.utils.trie import Trie
+from tide.utils.trie import RadixTrie
 
 log = logging.getLogger('API')
 
 
-acronyms_db = Trie()
+acronyms_db = RadixTrie()
 acronyms_db.insert('GL')
 acronyms_db.insert('RLE')   # Run Length Encoding
 acronyms_db.insert('YUV')   # Luma, Blue, Red
@@ -335,6 +336,65 @@ class BindCall:
         assert False
 
 
+# APIPass used by the workers, inherited from the parent process when it forks
+_worker_pass: Optional['APIPass'] = None
+
+
+def _generate_class_group(name):
+    """Generate the methods of a wrapper inside a worker, returns the statements added to the wrapper"""
+    api = _worker_pass
+    calls = api.groups[name]
+    class_def = calls[0][2]
+
+    start = len(class_def.body)
+    api.generate_class(calls)
+    return name, class_def.body[start:], api.wrapper_method_count.get(name, 0)
+
+
+class SymbolIndex:
+    """Symbols with the position of the statement that defined them.
+    Lookups made on behalf of a statement only see the symbols defined before it,
+    so the module can be indexed once and processed in any order.
+
+    Examples
+    --------
+    >>> index = SymbolIndex()
+    >>> index.define('A', 1, position=-1)
+    >>> index.define('A', 2, position=5)
+    >>> index.get('A', position=3), index.get('A', position=6), index.get('A')
+    (1, 2, 2)
+    >>> index.get('B', position=6) is None
+    True
+    """
+
+    def __init__(self):
+        self.entries = dict()
+
+    def define(self, name, value, position):
+        self.entries.setdefault(name, []).append((position, value))
+
+    def get(self, name, position=None, default=None):
+        entries = self.entries.get(name)
+
+        if not entries:
+            return default
+
+        if position is None:
+            return entries[-1][1]
+
+        for defined_at, value in reversed(entries):
+            if defined_at < position:
+                return value
+
+        return default
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class APIPass:
     """Generate a more friendly API for C bindings
 
@@ -348,21 +408,22 @@ class APIPass:
     * enum values are now scoped inside an enum class
     * enum values have shorter names since name clashing cannot happen anymore
     * rewrites function that takes pointer arguments to return multiple values
+    * optionally adds zero-copy views over struct buffers (see ``generate_buffer_accessors``)
     """
-    def __init__(self):
-        self.dispatcher = {
-            'Expr': self.expression,
-            'Assign': self.assign,
-            'ClassDef': self.class_definition,
-            'FunctionDef': self.function_definition
-        }
-        self.pre_dispatcher = {
-            'Expr': self.pre_expression,
-            'Assign': self.pre_assign,
-            'ClassDef': self.pre_class_definition,
-        }
-        self.ctypes = dict()
-        self.wrappers = dict()
+    # fields giving the number of elements of a pointer field
+    LENGTH_SUFFIXES = ('_len', '_length', '_count')
+    LENGTH_FIELDS = ('len', 'length', 'count')
+    # sizes are usually counted in bytes, they only give the length of byte buffers
+    SIZE_SUFFIXES = ('_size',)
+    SIZE_FIELDS = ('size',)
+    # fields giving the shape of a pixel buffer
+    PIXEL_FIELDS = ('pixels', 'data')
+    HEIGHT_FIELDS = ('h', 'height')
+    BYTE_TYPES = ('c_ubyte', 'c_uint8', 'c_byte', 'c_int8', 'c_char')
+
+    def __init__(self, buffer_accessors=False, processes=1):
+        self.ctypes = SymbolIndex()
+        self.wrappers = SymbolIndex()
         self.wrappers_2_ctypes = dict()
         # keep the order to know if we can annotate with Name of with string
         self.wrapper_order = dict()
@@ -371,25 +432,70 @@ class APIPass:
         self.wrapper_method_count = defaultdict(int)
         self.wrapper_ctor = defaultdict(list)
         self.ctypes_fields = dict()
+        # (position, c-name, statement) of the code added to the module
         self.new_code = []
-        self.names = Trie()
-        self.rename_types = dict()
+        self.names = RadixTrie()
+        self.rename_types = SymbolIndex()
         self.current_class_name = None
+        # position of the statement being processed
+        self.position = None
         self.new_names = set()
+        self.buffer_accessors = buffer_accessors
+        # number of processes generating the wrappers, None for the number of cores
+        self.processes = processes
+        # wrapper name -> [(position, binding, wrapper, is_constructor)]
+        self.groups = dict()
+
+        # Symbol index built by ``index``
+        # (position, statement) of the class definitions and aliases
+        self.declarations = []
+        # type of the first pointer argument -> [(position, binding)]
+        self.methods = defaultdict(list)
+        # returned pointer type -> [(position, binding)]
+        self.constructors = defaultdict(list)
+        # [(position, binding)]
+        self.functions = []
+
+    def index(self, module: T.Module):
+        """Index the module in a single pass: the structs and their fields, the aliases
+        and the bindings grouped by the type they are a method or a constructor of
+        """
+        for position, expr in enumerate(module.body):
+            if match(expr, 'Expr'):
+                expr = expr.value
+
+            kind = expr.__class__.__name__
+
+            if kind == 'ClassDef':
+                # structs are known by every statement, like the declarations of the C header
+                self.ctypes.define(expr.name, expr, -1)
+                self.declarations.append((position, expr))
 
-    def pre_expression(self, expr: T.Expr, depth):
-        values = self.preprocess(expr.value, depth)
-        if isinstance(values, (tuple, list)):
-            return [T.Expr(v) for v in values]
+            elif kind == 'Assign':
+                self.index_assign(position, expr)
 
-        return T.Expr(values)
+            elif kind != 'FunctionDef':
+                assert False, f'Unsupported statement {expr}'
+
+    def index_assign(self, position, expr: T.Assign):
+        # <function> = _bind('c-function', [cargs], rtype, docstring=, arg_names=)
+        if BindCall.is_binding_call(expr.value):
+            call = BindCall(expr.value)
+            self_name = call.is_method()
 
-    def pre_class_definition(self, class_def: T.ClassDef, depth=0):
-        self.ctypes[class_def.name] = class_def
+            if self_name is not None:
+                self.methods[self_name].append((position, call))
+                return
+
+            self_name = call.is_constructor()
+            if self_name is not None:
+                self.constructors[self_name].append((position, call))
+                return
+
+            self.functions.append((position, call))
 
-    def pre_assign(self, expr: T.Assign, depth):
         # <c-type>._fields_ = []
-        if match(expr.targets[0], 'Attribute') and match(expr.value, 'List') and expr.targets[0].attr == '_fields_':
+        elif match(expr.targets[0], 'Attribute') and match(expr.value, 'List') and expr.targets[0].attr == '_fields_':
             ctype_name = expr.targets[0].value.id
             data = []
             self.ctypes_fields[ctype_name] = data
@@ -399,22 +505,16 @@ class APIPass:
                 ctype = elem.elts[1]
                 data.append((name, ctype))
 
-    def preprocess(self, expr, depth):
-        handler = self.pre_dispatcher.get(expr.__class__.__name__, None)
-
-        if handler is not None:
-            handler(expr, depth)
-
-    def preprocessor(self, module: T.Module, depth=0):
-        for expr in module.body:
-            self.preprocess(expr, depth)
+        # <Name> = <Name>
+        elif match(expr.value, 'Name') and match(expr.targets[0], 'Name'):
+            self.declarations.append((position, expr))
 
     def post_process_class_defintion(self, class_def: T.ClassDef):
         """Make a final pass over the generated class to improve function names"""
 
         # move the documentation over to our new class
         c_class_name = self.wrappers_2_ctypes[class_def.name]
-        c_class_def = self.ctypes[c_class_name]
+        c_class_def = self.ctypes.get(c_class_name)
         docstring = fetch_docstring(c_class_def)
 
         if docstring:
@@ -454,6 +554,130 @@ class APIPass:
             for useless_name in names:
                 expr.name = clean_name(expr.name, useless_name)
 
+    @staticmethod
+    def is_pointer_field(ctype) -> bool:
+        return (match(ctype, 'Name') and ctype.id == 'c_void_p') or (
+            match(ctype, 'Call', ('func', 'Name')) and ctype.func.id == 'POINTER')
+
+    def is_byte_buffer(self, ctype) -> bool:
+        if match(ctype, 'Name'):
+            return ctype.id == 'c_void_p'
+
+        return match(ctype.args[0], 'Name') and ctype.args[0].id in self.BYTE_TYPES
+
+    def buffer_views(self, fields: List[Tuple[str, T.Expression]]) -> List[Tuple[str, T.Call]]:
+        """Find the pointer fields whose size is given by a companion field,
+        returns the name of the field and the expression building its view
+        """
+        names = {name for name, _ in fields}
+        pointers = [(name, ctype) for name, ctype in fields if self.is_pointer_field(ctype)]
+
+        def attr(n):
+            return T.Attribute(T.Name('self'), n)
+
+        height = next((h for h in self.HEIGHT_FIELDS if h in names), None)
+        views = []
+
+        for name, ctype in pointers:
+            # pixels of a surface: rows of pitch bytes
+            if name in self.PIXEL_FIELDS and height and 'pitch' in names and self.is_byte_buffer(ctype):
+                views.append((name, T.Call(T.Name('pitched_view'), [attr(name), attr(height), attr('pitch')])))
+                continue
+
+            suffixes = self.LENGTH_SUFFIXES
+            generic = self.LENGTH_FIELDS
+            if self.is_byte_buffer(ctype):
+                suffixes = suffixes + self.SIZE_SUFFIXES
+                generic = generic + self.SIZE_FIELDS
+
+            lengths = [f'{name}{suffix}' for suffix in suffixes] + [f'num_{name}']
+
+            # a generic length field is only unambiguous when there is a single pointer
+            if len(pointers) == 1:
+                lengths.extend(generic)
+
+            length = next((n for n in lengths if n in names), None)
+            if length is not None:
+                views.append((name, T.Call(T.Name('pointer_view'), [attr(name), attr(length)])))
+
+        return views
+
+    def generate_buffer_accessors(self):
+        """Add zero-copy views over the buffers of the structs whose size can be found from their fields.
+        The views are properties of the ctypes struct named ``<field>_view``
+
+        Examples
+        --------
+        >>> from tide.generators.clang_utils import parse_clang
+        >>> from tide.generators.binding_generator import BindingGenerator, compact, unparse
+        >>> tu, index = parse_clang(''
+        ... 'typedef struct Surface { int w, h, pitch; void* pixels; void* userdata; } Surface;'
+        ... 'typedef struct Mesh { float* vertices; int vertices_len; } Mesh;'
+        ... 'typedef struct Chunk { unsigned char* bytes; int size; } Chunk;'
+        ... 'typedef struct Samples { float* samples; int size; } Samples;')
+        >>> module = APIPass(buffer_accessors=True).generate(BindingGenerator().generate(tu))
+        >>> print(compact(unparse(module)))
+        <BLANKLINE>
+        class Surface(Structure):
+        <BLANKLINE>
+            @property
+            def pixels_view(self):
+                return pitched_view(self.pixels, self.h, self.pitch)
+        <BLANKLINE>
+        Surface._fields_ = [('w', c_int), ('h', c_int), ('pitch', c_int), ('pixels', c_void_p), ('userdata', c_void_p)]
+        <BLANKLINE>
+        class Mesh(Structure):
+        <BLANKLINE>
+            @property
+            def vertices_view(self):
+                return pointer_view(self.vertices, self.vertices_len)
+        <BLANKLINE>
+        Mesh._fields_ = [('vertices', POINTER(c_float)), ('vertices_len', c_int)]
+        <BLANKLINE>
+        class Chunk(Structure):
+        <BLANKLINE>
+            @property
+            def bytes_view(self):
+                return pointer_view(self.bytes, self.size)
+        <BLANKLINE>
+        Chunk._fields_ = [('bytes', POINTER(c_ubyte)), ('size', c_int)]
+        <BLANKLINE>
+        class Samples(Structure):
+            pass
+        <BLANKLINE>
+        Samples._fields_ = [('samples', POINTER(c_float)), ('size', c_int)]
+        <BLANKLINE>
+        Surface = Surface
+        <BLANKLINE>
+        Mesh = Mesh
+        <BLANKLINE>
+        Chunk = Chunk
+        <BLANKLINE>
+        Samples = Samples
+        <BLANKLINE>
+        """
+        for ctype_name, fields in self.ctypes_fields.items():
+            class_def = self.ctypes.get(ctype_name)
+            if not match(class_def, 'ClassDef'):
+                continue
+
+            names = {name for name, _ in fields}
+            accessors = []
+
+            for name, view in self.buffer_views(fields):
+                accessor_name = f'{name}_view'
+                if accessor_name in names:
+                    continue
+
+                accessor = T.FunctionDef(accessor_name, decorator_list=[T.Name('property')])
+                accessor.args = T.Arguments(args=[T.Arg('self')])
+                accessor.body = [T.Return(view)]
+                accessors.append(accessor)
+
+            if accessors:
+                class_def.body = [e for e in class_def.body if not isinstance(e, (ast.Pass, T.Pass))]
+                class_def.body.extend(accessors)
+
     def group_constant_to_enums(self):
         pass
 
@@ -464,9 +688,9 @@ class APIPass:
 
         # make a short alias of the enum (without the hardcoded c namespace)
         if cl_name != class_def.name:
-            self.new_code.append((None, T.Assign([T.Name(cl_name)], T.Name(class_def.name))))
+            self.new_code.append((self.position, None, T.Assign([T.Name(cl_name)], T.Name(class_def.name))))
 
-        t = Trie()
+        t = RadixTrie()
         counts = 0
         for expr in class_def.body:
             if match(expr, 'Assign') and match(expr.targets[0], 'Name'):
@@ -513,14 +737,14 @@ class APIPass:
         # does this class define fields
         return self.ctypes_fields.get(name, None) is None
 
-    def class_definition(self, class_def: T.ClassDef, depth):
+    def class_definition(self, class_def: T.ClassDef):
         assert class_def.name in self.ctypes
 
         # Opaque struct: move on
         # if class_def.name[0] == '_':
         #    return class_def
 
-        self_wrap = self.wrappers.get(class_def.name)
+        self_wrap = self.wrappers.get(class_def.name, self.position)
         if self_wrap is None:
             if T.Name('enumeration') in class_def.decorator_list:
                 return self.clean_up_enumeration(class_def)
@@ -529,8 +753,8 @@ class APIPass:
 
             cl_name = class_name(*names)
             self_wrap = T.ClassDef(cl_name)
-            self.new_code.append((class_def.name, self_wrap))
-            self.wrappers[class_def.name] = self_wrap
+            self.new_code.append((self.position, class_def.name, self_wrap))
+            self.wrappers.define(class_def.name, self_wrap, self.position)
             self.wrappers_2_ctypes[self_wrap.name] = class_def.name
             self.wrapper_order[self_wrap.name] = len(self.wrappers)
 
@@ -565,17 +789,25 @@ class APIPass:
 
                 self_wrap.body.append(default_init)
 
-            self.rename_types[T.Call(T.Name('POINTER'), [T.Name(class_def.name)])] = cl_name
+            self.rename_types.define(T.Call(T.Name('POINTER'), [T.Name(class_def.name)]), cl_name, self.position)
 
         return class_def
 
-    def function_definition(self, function_def: T.FunctionDef, depth):
-        return function_def
+    def alias(self, expr: T.Assign):
+        alias_name = expr.targets[0].id
+        aliased_name = expr.value.id
+
+        aliased_ctype = self.ctypes.get(aliased_name, self.position)
+        aliased_wrapped = self.wrappers.get(aliased_name, self.position)
+
+        self.rename_types.define(aliased_name, alias_name, self.position)
+        self.ctypes.define(alias_name, aliased_ctype, self.position)
+        self.wrappers.define(alias_name, aliased_wrapped, self.position)
 
     SELF_HANDLE = T.Attribute(T.Name('self'), 'handle')
 
     def rename(self, n):
-        new_name = self.rename_types.get(n, None)
+        new_name = self.rename_types.get(n, self.position)
         if new_name:
             arg_type_order = self.wrapper_order.get(new_name, None)
             class_order = self.wrapper_order.get(self.current_class_name, None)
@@ -735,48 +967,74 @@ class APIPass:
         if self.is_multi_output(new_fun, offset=0):
             new_fun = self.rewrite_multi_output_function(new_fun, offset=0)
 
-        self.new_code.append((None, new_fun))
+        self.new_code.append((self.position, None, new_fun))
         return
 
-    def process_bind_call(self, call: BindCall, parent):
-        """Try to find the class this function belongs to"""
-        fun_name = call.function_name
-
-        # constructor
-        self_name = call.is_constructor()
-        if self_name and call.is_method() is None:
-            class_def: T.ClassDef = self.wrappers.get(self_name)
-            if class_def:
-                return self.generate_constructor(class_def, call)
-
-            return self.generate_function_wrapper(call)
-        # ---
-
-        self_name = call.is_method()
-        # not a method
-        if self_name is None:
-            self.generate_function_wrapper(call)
-            return parent
+    def method_owner(self, self_name, position) -> Optional[T.ClassDef]:
+        """Returns the wrapper a method belongs to, None if it is a function.
+        Raises KeyError when the wrapper is not known yet and the method cannot be generated
+        """
+        self_def = self.ctypes.get(self_name, position)
 
-        self_def = self.ctypes.get(self_name)
+        # not a known class
         if not self_def:
-            log.debug(f'Method `{fun_name}` does not have c-class')
-            self.generate_function_wrapper(call)
-            return parent
+            log.debug(f'`{self_name}` does not have c-class')
+            return None
 
-        # not a known class
         if not match(self_def, 'ClassDef'):
-            self.generate_function_wrapper(call)
-            return parent
+            return None
 
         # Generate our new python class that will wrap the ctypes
-        self_wrap: T.ClassDef = self.wrappers.get(self_name)
-        if self_wrap is None and match(self_def, 'ClassDef'):
-            log.debug(f'Method `{fun_name}` does not have wrapped class `{self_name}`')
-            return parent
+        self_wrap: T.ClassDef = self.wrappers.get(self_name, position)
+        if self_wrap is None:
+            raise KeyError(self_name)
+
+        return self_wrap
 
-        self.generate_method(call, self_wrap)
-        return parent
+    def group_bindings(self):
+        """Find the class each binding belongs to, returns the bindings grouped by class
+        and the bindings that are plain functions ordered by position
+        """
+        groups = defaultdict(list)
+        functions = list(self.functions)
+
+        for self_name, calls in self.constructors.items():
+            for position, call in calls:
+                class_def = self.wrappers.get(self_name, position)
+
+                if class_def:
+                    groups[class_def.name].append((position, call, class_def, True))
+                else:
+                    functions.append((position, call))
+
+        for self_name, calls in self.methods.items():
+            for position, call in calls:
+                try:
+                    self_wrap = self.method_owner(self_name, position)
+                except KeyError:
+                    log.debug(f'Method `{call.function_name}` does not have wrapped class `{self_name}`')
+                    continue
+
+                if self_wrap is None:
+                    functions.append((position, call))
+                else:
+                    groups[self_wrap.name].append((position, call, self_wrap, False))
+
+        for calls in groups.values():
+            calls.sort(key=lambda c: c[0])
+
+        functions.sort(key=lambda c: c[0])
+        return groups, functions
+
+    def generate_class(self, calls):
+        """Generate the constructors and methods of a wrapper"""
+        for position, call, class_def, is_constructor in calls:
+            self.position = position
+
+            if is_constructor:
+                self.generate_constructor(class_def, call)
+            else:
+                self.generate_method(call, class_def)
 
     handle_is_not_none = T.Assert(
         test=T.Compare(
@@ -878,51 +1136,78 @@ class APIPass:
 
         return new_func
 
-    def struct_fields(self, expr: T.Assign):
-        ctype_name = expr.targets[0].value.id
-        assert ctype_name in self.ctypes_fields
+    def generate_classes(self, names: List[str]):
+        """Generate the wrappers, each wrapper only depends on the index so they can be generated
+        in parallel, the results are merged following ``names``.
+        Workers are forked to inherit the index, when fork is not available the wrappers are generated sequentially
+
+        Examples
+        --------
+        >>> from tide.generators.clang_utils import parse_clang
+        >>> from tide.generators.binding_generator import BindingGenerator, unparse
+        >>> code = ''.join(f'typedef struct S{i} {{ int a; }} S{i}; int S{i}_Get(S{i}* s);' for i in range(4))
+        >>> parallel = APIPass(processes=2).generate(BindingGenerator().generate(parse_clang(code)[0]))
+        >>> sequential = APIPass().generate(BindingGenerator().generate(parse_clang(code)[0]))
+        >>> unparse(parallel) == unparse(sequential)
+        True
+        """
+        processes = self.processes
+        if processes is None:
+            processes = multiprocessing.cpu_count()
 
-    def assign(self, expr: T.Assign, depth):
-        # <function> = _bind('c-function', [cargs], rtype, docstring=, arg_names=)
-        if BindCall.is_binding_call(expr.value):
-            expr = self.process_bind_call(BindCall(expr.value), expr)
+        if processes <= 1 or len(names) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for name in names:
+                self.generate_class(self.groups[name])
+            return
 
-        # <c-type>._fields_ = []
-        elif match(expr.targets[0], 'Attribute') and match(expr.value, 'List') and expr.targets[0].attr == '_fields_':
-            self.struct_fields(expr)
+        global _worker_pass
+        _worker_pass = self
 
-        # <Name> = <Name>
-        elif match(expr.value, 'Name') and match(expr.targets[0], 'Name'):
-            alias_name = expr.targets[0].id
-            aliased_name = expr.value.id
+        try:
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                chunksize = max(len(names) // (processes * 4), 1)
 
-            aliased_ctype = self.ctypes.get(aliased_name)
-            aliased_wrapped = self.wrappers.get(aliased_name)
+                # imap returns the results in order
+                for name, body, method_count in pool.imap(_generate_class_group, names, chunksize):
+                    calls = self.groups[name]
+                    calls[0][2].body.extend(body)
 
-            self.rename_types[aliased_name] = alias_name
-            self.ctypes[alias_name] = aliased_ctype
-            self.wrappers[alias_name] = aliased_wrapped
+                    if method_count:
+                        self.wrapper_method_count[name] = method_count
 
-        return expr
+                    # the workers cleared their copy of the bindings
+                    for _, call, _, _ in calls:
+                        call.clear_kwargs()
+        finally:
+            _worker_pass = None
 
-    def expression(self, expr: T.Expr, depth):
-        values = self.dispatch(expr.value, depth)
-        if isinstance(values, (tuple, list)):
-            return [T.Expr(v) for v in values]
+    def generate(self, module: T.Module, depth=0):
+        self.index(module)
 
-        return T.Expr(values)
+        if self.buffer_accessors:
+            self.generate_buffer_accessors()
 
-    def generate(self, module: T.Module, depth=0):
-        new_module: T.Module = ast.Module()
-        new_module.body = []
+        for position, expr in self.declarations:
+            self.position = position
+
+            if match(expr, 'ClassDef'):
+                self.class_definition(expr)
+            else:
+                self.alias(expr)
+
+        self.groups, functions = self.group_bindings()
+        self.generate_classes(sorted(self.groups, key=self.wrapper_order.get))
 
-        self.preprocessor(module)
+        for position, call in functions:
+            self.position = position
+            self.generate_function_wrapper(call)
+
+        self.position = None
 
-        for expr in module.body:
-            self.dispatch(expr, depth + 1)
+        # insert our new bindings at the end, in the order of the statements they come from
+        self.new_code.sort(key=lambda c: c[0])
 
-        # insert our new bindings at the end
-        for k, v in self.new_code:
+        for _, k, v in self.new_code:
             if isinstance(v, T.ClassDef):
                 if self.wrapper_method_count.get(v.name, 0) > 0:
                     self.post_process_class_defintion(v)
@@ -937,22 +1222,13 @@ class APIPass:
 
         return module
 
-    def dispatch(self, expr, depth) -> T.Expr:
-        handler = self.dispatcher.get(expr.__class__.__name__, None)
-
-        if handler is None:
-            print(expr)
-            assert False
-
-        return handler(expr, depth)
-
 
 def generate_api_bindings():
     from tide.generators.binding_generator import BindingGenerator, generate_bindings
 
     bindings = BindingGenerator.run('/usr/include/SDL2/SDL.h')
 
-    api = APIPass()
+    api = APIPass(processes=None)
 
     bindings = api.generate(bindings)
 
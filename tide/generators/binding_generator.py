@@ -1,5 +1,6 @@
 import ast
 from ast import Module
+import copy
 from dataclasses import dataclass
 import logging
 import re
@@ -10,8 +11,12 @@ from astunparse import dump
 import clang.cindex
 from clang.cindex import Cursor, CursorKind, Type, SourceLocation, TypeKind, Token
 
+from tide.generators.clang_utils import TranslationUnitCache, TokenCache, compact_tokens
+from tide.generators.constant_folding import ConstantFolding
+from tide.generators.incremental import IncrementalGeneration
+from tide.generators.macros import MacroGraph
 from tide.generators.unparser_patch import unparse
-from tide.generators.debug import show_elem, traverse, d
+from tide.generators.debug import show_elem, debug_elem, traverse, d, DispatchProfile
 from tide.generators.operator_precedence import is_operator, TokenParser, UnsupportedExpression
 import tide.generators.nodes as T
 
@@ -72,6 +77,59 @@ def compact(string):
     return empty_line.sub('', string)
 
 
+def type_key(node):
+    """Structural key of a type expression, None if the expression cannot be shared"""
+    if isinstance(node, T.Name):
+        return 'Name', node.id
+
+    if isinstance(node, T.Constant):
+        return 'Constant', node.value
+
+    if isinstance(node, T.Call) and not node.keywords:
+        func = type_key(node.func)
+        args = tuple(type_key(a) for a in node.args)
+
+        if func is None or None in args:
+            return None
+
+        return 'Call', func, args
+
+    if isinstance(node, T.BinOp):
+        left = type_key(node.left)
+        right = type_key(node.right)
+
+        if left is None or right is None:
+            return None
+
+        return 'BinOp', left, node.op.__class__.__name__, right
+
+    return None
+
+
+class TypeInterner:
+    """Hash-cons the generated type expressions so every use of a type shares the same node.
+    Types can then be compared by identity, the interner can be shared between generators
+
+    Examples
+    --------
+    >>> types = TypeInterner()
+    >>> a = types(T.Call(T.Name('POINTER'), [T.Name('SDL_Window')]))
+    >>> b = types(T.Call(T.Name('POINTER'), [T.Name('SDL_Window')]))
+    >>> a is b
+    True
+    """
+    def __init__(self):
+        self.nodes = dict()
+
+    def __call__(self, node):
+        key = type_key(node)
+
+        if key is None:
+            return node
+
+        return self.nodes.setdefault(key, node)
+
+
 class Unsupported(Exception):
     pass
 
@@ -125,6 +183,7 @@ def parse_macro(tokens):
     []
 
     """
+    tokens = compact_tokens(tokens)
     name = tokens[0]
     args = []
 
@@ -205,84 +264,127 @@ def get_comment(elem, indent='    '):
     return comment
 
 
-def sorted_children(cursor):
-    """Because macros are processed first we have have issues when transforming them to functions
-    so we need to insert them in their right position in a kind of stable merge kind of operation.
-    This does not guarantee macros to work because in C they can be defined earlier than the entities they used
-    although in practice they should be close
+MACRO_KINDS = {CursorKind.MACRO_DEFINITION, CursorKind.MACRO_INSTANTIATION, CursorKind.INCLUSION_DIRECTIVE}
 
-    This also allow us to group Macro and their definitions.
-    For example is is often the case that function definition have additional attributes prepended through macros.
+
+def snapshot_children(cursor, guard=None):
+    """Read the location of every child of cursor in a single sweep
+
+    Parameters
+    ----------
+    guard: str
+        when provided, children of files whose name does not start with guard are skipped,
+        the decision is made once per file
+
+    Returns
+    -------
+    files: list of the file names in the order they were first seen
+    macros: list of (file index, line, cursor) for the macros
+    declarations: list of (file index, line, cursor) for everything else
+    builtin: list of cursors without location
     """
-    def is_builtin(elem):
-        return elem.location.file is None
+    file_index = dict()
+    files = []
+    macros = []
+    declarations = []
+    builtin = []
+
+    for elem in cursor.get_children():
+        loc = elem.location
+        file = loc.file
+
+        if file is None:
+            builtin.append(elem)
+            continue
+
+        name = file.name
+        index = file_index.get(name)
+        if index is None:
+            if guard is not None and not str(name).startswith(guard):
+                index = -1
+            else:
+                index = len(files)
+                files.append(name)
 
-    def is_not_builtin(elem):
-        return not is_builtin(elem)
+            file_index[name] = index
 
-    elements = list(filter(is_not_builtin, cursor.get_children()))
-    builtin = list(filter(is_builtin, cursor.get_children()))
+        if index < 0:
+            continue
 
-    def is_macro(elem):
-        return elem.kind in (CursorKind.MACRO_DEFINITION, CursorKind.MACRO_INSTANTIATION, CursorKind.INCLUSION_DIRECTIVE)
+        if elem.kind in MACRO_KINDS:
+            macros.append((index, loc.line, elem))
+        else:
+            declarations.append((index, loc.line, elem))
 
-    def not_macro(elem):
-        return not is_macro(elem)
+    return files, macros, declarations, builtin
 
-    file_order = dict()
-    for e in elements:
-        if e.location.file.name not in file_order:
-            file_order[e.location.file.name] = len(file_order)
 
-    #
-    macros = list(filter(is_macro, reversed(elements)))
-    not_macros = list(filter(not_macro, reversed(elements)))
+def sorted_children_files(cursor, guard=None):
+    """Same as :func:`sorted_children` but also returns the file name of each element,
+    elements outside of the guard are dropped before the merge
 
-    assert len(elements) > 0
-    assert len(macros) + len(not_macros) == len(elements)
+    Examples
+    --------
+    >>> from tide.generators.clang_utils import parse_clang
+    >>> tu, index = parse_clang('#define A 1\\nint a;\\n#define B 2\\nint b;\\n')
+    >>> children, files, builtin = sorted_children_files(tu.cursor)
+    >>> [c.spelling for c in children]
+    ['A', 'a', 'B', 'b']
+    >>> files
+    ['temporary_buffer_1234.c', 'temporary_buffer_1234.c', 'temporary_buffer_1234.c', 'temporary_buffer_1234.c']
+    >>> children, files, builtin = sorted_children_files(tu.cursor, guard='/usr/include')
+    >>> children, len(builtin) > 0
+    ([], True)
+    """
+    files, macros, declarations, builtin = snapshot_children(cursor, guard)
 
     merged = []
+    merged_files = []
+    i, j = 0, 0
+    n, m = len(macros), len(declarations)
 
-    def pop(array):
-        if len(array) > 0:
-            return array.pop()
+    while i < n and j < m:
+        macro_file, macro_line, macro = macros[i]
+        expr_file, expr_line, expr = declarations[j]
 
-    macro = pop(macros)
-    expr = pop(not_macros)
+        if macro_file != expr_file:
+            take_macro = macro_file > expr_file
+        else:
+            take_macro = macro_line <= expr_line
 
-    while len(not_macros) > 0 or len(macros) > 0 or expr is not None or macro is not None:
-        # dump the remaining macros/expr
-        if expr is None and macro is not None:
+        if take_macro:
             merged.append(macro)
-            macro = pop(macros)
-
-        elif macro is None and expr is not None:
+            merged_files.append(files[macro_file])
+            i += 1
+        else:
             merged.append(expr)
-            expr = pop(not_macros)
+            merged_files.append(files[expr_file])
+            j += 1
 
-        elif macro.location.file.name != expr.location.file.name:
-            macro_file = file_order[macro.location.file.name]
-            expr_file = file_order[expr.location.file.name]
+    # dump the remaining macros/expr
+    for file, _, elem in macros[i:]:
+        merged.append(elem)
+        merged_files.append(files[file])
 
-            if macro_file > expr_file:
-                merged.append(macro)
-                macro = pop(macros)
-            else:
-                merged.append(expr)
-                expr = pop(not_macros)
+    for file, _, elem in declarations[j:]:
+        merged.append(elem)
+        merged_files.append(files[file])
 
-        elif macro.location.file.name == expr.location.file.name:
-            if macro.location.line > expr.location.line:
-                merged.append(expr)
-                expr = pop(not_macros)
-            else:
-                merged.append(macro)
-                macro = pop(macros)
+    return merged, merged_files, builtin
 
-        else:
-            raise RuntimeError()
 
-    assert len(merged) == len(elements)
+def sorted_children(cursor):
+    """Because macros are processed first we have have issues when transforming them to functions
+    so we need to insert them in their right position in a kind of stable merge kind of operation.
+    This does not guarantee macros to work because in C they can be defined earlier than the entities they used
+    although in practice they should be close
+
+    This also allow us to group Macro and their definitions.
+    For example is is often the case that function definition have additional attributes prepended through macros.
+
+    The locations are read once (see :func:`snapshot_children`), the merge itself only compares integers.
+    """
+    merged, _, builtin = sorted_children_files(cursor)
     return merged, builtin
 
 
@@ -300,8 +402,18 @@ class BindingGenerator:
 
     """
 
-    def __init__(self):
-        self.type_registry = type_mapping()
+    def __init__(self, types: TypeInterner = None, profile: DispatchProfile = None):
+        if types is None:
+            types = TypeInterner()
+
+        self.types = types
+        # opt-in statistics about the dispatched elements
+        self.profile = profile
+        # tokens of the cursors of the translation unit being processed
+        self.token_cache = TokenCache()
+        # dependencies between the macros of the translation unit being processed
+        self.macros = MacroGraph()
+        self.type_registry = {k: types(v) for k, v in type_mapping().items()}
         # keep track of all the macros we cannot support
         # so other macros using those will be me ignored as well
         self.unsupported_macros = set()
@@ -354,20 +466,122 @@ class BindingGenerator:
         return T.Name(elem.spelling)
 
     @staticmethod
-    def run(include, guard=None):
+    def run(include, guard=None, cache: TranslationUnitCache = None, incremental: IncrementalGeneration = None,
+            stream=False, profile: DispatchProfile = None):
+        """Parse the header and generate its bindings
+
+        Parameters
+        ----------
+        profile: DispatchProfile
+            when provided, collect the number of calls and the time spent per element kind
+        cache: TranslationUnitCache
+            when provided the parsed translation unit is reused between runs as long as
+            none of the included files changed
+
+        incremental: IncrementalGeneration
+            reuse the statements generated by a previous run for the files that did not change
+
+        stream: bool
+            returns an iterator over the top level statements instead of a module
+        """
         import os
 
         if guard is None:
             guard = os.path.dirname(include)
 
         index = clang.cindex.Index.create()
-        tu = index.parse(include, options=0x01)
+        if cache is not None:
+            tu = cache.parse(index, include, options=0x01)
+        else:
+            tu = index.parse(include, options=0x01)
 
         for diag in tu.diagnostics:
             log.debug(diag.format())
 
+        gen = BindingGenerator(profile=profile)
+        if stream:
+            return gen.iter_generate(tu, guard=guard, incremental=incremental)
+
+        return gen.generate(tu, guard=guard, incremental=incremental)
+
+    @staticmethod
+    def run_parallel(headers, guard=None, processes=None):
+        """Generate the bindings of each file of the library in a separate process and merge them
+
+        The work list is made of the files included by ``headers`` that are inside the guard,
+        the included files come before the files including them, like in :meth:`run`.
+        Each worker parses the header including its file, so the declarations keep their context,
+        and only generates the declarations found in that file.
+        The type registry, definitions and unsupported macros of every worker are merged in order,
+        the types are interned again so the merged module shares them like a single generator would.
+
+        Parameters
+        ----------
+        headers: List[str]
+            top level headers of the library
+
+        guard: str
+            only the files starting with guard are generated, defaults to the folder of each header
+
+        processes: int
+            number of worker processes, defaults to the number of cores
+        """
+        import os
+        import multiprocessing
+
+        index = clang.cindex.Index.create()
+        work = []
+        seen = set()
+
+        for header in headers:
+            header_guard = guard
+            if header_guard is None:
+                header_guard = os.path.dirname(header)
+
+            tu = index.parse(header)
+            for filename in library_files(tu, header_guard):
+                if filename not in seen:
+                    seen.add(filename)
+                    work.append((header, filename))
+
         gen = BindingGenerator()
-        return gen.generate(tu, guard=guard)
+        module: T.Module = Module()
+        module.body = []
+
+        with multiprocessing.Pool(processes) as pool:
+            # imap returns the results in order
+            for result in pool.imap(_generate_header, work):
+                module.body.extend(gen.merge(result))
+
+        return module
+
+    def merge(self, result: 'HeaderBindings'):
+        """Merge the state of a worker into this generator, returns the statements of the worker"""
+        # nodes of the worker replaced by the node shared by this generator
+        shared = dict()
+        for node in result.types:
+            shared[id(node)] = self.types(node)
+
+        for node in result.types:
+            if shared[id(node)] is node:
+                share_children(node, shared)
+
+        for k, v in result.type_registry.items():
+            self.type_registry.setdefault(k, shared.get(id(v), v))
+
+        for k, v in result.definitions.items():
+            self.definitions.setdefault(k, v)
+
+        for k, v in result.renaming.items():
+            self.renaming.setdefault(k, v)
+
+        self.unsupported_macros.update(result.unsupported_macros)
+        self.import_enum = self.import_enum or result.import_enum
+
+        for stmt in result.body:
+            share_children(stmt, shared)
+
+        return result.body
 
     def generate_typedef(self, elem, **kwargs):
         """Generate a type alias
@@ -389,12 +603,12 @@ class BindingGenerator:
         # SDL_version = struct SDL_version
         if t1.spelling == t2.spelling.split(' ')[-1]:
             if t2.spelling not in self.type_registry:
-                self.type_registry[t2.spelling] = T.Name(t1.spelling, ctx=ast.Load())
+                self.type_registry[t2.spelling] = self.types(T.Name(t1.spelling, ctx=ast.Load()))
             return None
 
         t2type: T.Name = self.generate_type(t2)
         if t2.spelling not in self.type_registry:
-            self.type_registry[t2.spelling] = T.Name(t1.spelling, ctx=ast.Load())
+            self.type_registry[t2.spelling] = self.types(T.Name(t1.spelling, ctx=ast.Load()))
 
         expr = ast.Assign([T.Name(t1.spelling, ctx=ast.Store())], t2type)
         return expr
@@ -414,7 +628,7 @@ class BindingGenerator:
             log.debug(f'{d(depth)}Found cached type `{cached_type}`')
             return cached_type
 
-        val = self._generate_type(type, depth)
+        val = self.types(self._generate_type(type, depth))
         self.type_registry[type.spelling] = val
         log.debug(f'{d(depth)}Resolved type `{type.spelling}` to `{val}`')
         return val
@@ -438,7 +652,7 @@ class BindingGenerator:
 
             # Typedef use the name that it is aliased to
             if pointee.kind is TypeKind.TYPEDEF:
-                pointee = get_typename(pointee)
+                pointee = self.types(get_typename(pointee))
 
             elif pointee.kind != TypeKind.VOID:
                 pointee = self.generate_type(pointee, depth + 1)
@@ -497,7 +711,7 @@ class BindingGenerator:
             return get_typename(type)
 
         # print('gentype')
-        show_elem(type, print_fun=log.debug)
+        debug_elem(type)
         return get_typename(type)
 
     def generate_function(self, elem: Cursor, depth=0, **kwargs):
@@ -607,8 +821,7 @@ class BindingGenerator:
             return type.get_declaration().get_usr()
 
         if type.kind == TypeKind.ELABORATED:
-            show_elem(type)
-            print(type.get_declaration().get_usr())
+            debug_elem(type)
             return type.get_declaration().get_usr()
 
         return type.get_declaration().get_usr()
@@ -693,8 +906,8 @@ class BindingGenerator:
 
         # For recursive data structure
         #  log.debug(pyname)
-        self.type_registry[f'struct {pyname}'] = T.Name(pyname)
-        self.type_registry[f'const struct {pyname}'] = T.Name(pyname)
+        self.type_registry[f'struct {pyname}'] = self.types(T.Name(pyname))
+        self.type_registry[f'const struct {pyname}'] = self.types(T.Name(pyname))
 
         parent = pyname
         anonymous_renamed = self.find_anonymous_fields(elem, parent, depth=depth + 1)
@@ -873,6 +1086,17 @@ class BindingGenerator:
         <BLANKLINE>
         SDL_AUDIO_ALLOW_ANY_CHANGE = (SDL_AUDIO_ALLOW_FREQUENCY_CHANGE | (SDL_AUDIO_ALLOW_FORMAT_CHANGE | SDL_AUDIO_ALLOW_CHANNELS_CHANGE))
         <BLANKLINE>
+
+        Macros using macros defined after them are replaced by their value when possible
+
+        >>> tu, index = parse_clang('#define B (A | 2)\\n#define A 1\\n')
+        >>> module = BindingGenerator().generate(tu)
+        >>> print(compact(unparse(module)))
+        <BLANKLINE>
+        B = 3
+        <BLANKLINE>
+        A = 1
+        <BLANKLINE>
         """
         # builtin macros
         if elem.location.file is None:
@@ -882,7 +1106,7 @@ class BindingGenerator:
 
         args = list(elem.get_arguments())
         children = list(elem.get_children())
-        tokens = list(elem.get_tokens())
+        tokens = self.token_cache.tokens(elem)
 
         if len(args) != 0:
             for arg in args:
@@ -905,27 +1129,26 @@ class BindingGenerator:
         if name.spelling == 'NULL':
             return T.Assign([T.Name('NULL')], T.Name('None'))
 
-        try:
-            bods = {t.spelling for t in tok_body}
-            if not bods.isdisjoint(self.unsupported_macros):
-                raise UnsupportedExpression()
-
-            py_body = parse_macro2(
-                name,
-                tok_args,
-                tok_body,
-                self.definitions,
-                self.type_registry,
-                self.renaming)
+        if self.macros.matches(name, tok_args, tok_body):
+            # the macros it depends on are evaluated first
+            evaluation = self.macros.evaluate(name.spelling, self.parse_macro)
+        else:
+            evaluation = self.macros.evaluate_definition(name, tok_args, tok_body, self.parse_macro)
 
-        except UnsupportedExpression:
+        if not evaluation.supported:
             self.unsupported_macros.add(name.spelling)
             body = [b.spelling for b in tok_body]
             log.warning(f'Unsupported expression, cannot transform macro {name.spelling} {"".join(body)}')
             return
 
+        # the evaluation is kept for the next incremental run, do not share it with the module
+        py_body = copy.deepcopy(evaluation.body)
         name = name.spelling
 
+        # the macro uses macros defined after it, use its value so the module can be imported
+        if evaluation.value is not None and self.macros.is_forward_reference(name):
+            py_body = T.Constant(evaluation.value)
+
         # if name == 'SDL_TOUCH_MOUSEID':
         #     print(py_body)
         #     assert False
@@ -952,6 +1175,40 @@ class BindingGenerator:
 
         return func
 
+    def parse_macro(self, name, tok_args, tok_body):
+        """Parse the body of a macro into a python expression, raise UnsupportedExpression on failure"""
+        bods = {t.spelling for t in tok_body}
+        if not bods.isdisjoint(self.unsupported_macros):
+            raise UnsupportedExpression()
+
+        return parse_macro2(
+            name,
+            tok_args,
+            tok_body,
+            self.definitions,
+            self.type_registry,
+            self.renaming)
+
+    def collect_macros(self, children, incremental: IncrementalGeneration = None):
+        """Build the dependency graph of the macros about to be generated"""
+        previous = None
+        if incremental is not None:
+            previous = incremental.macros
+
+        self.macros = MacroGraph(previous)
+
+        for elem in children:
+            if elem.kind != CursorKind.MACRO_DEFINITION:
+                continue
+
+            tokens = self.token_cache.tokens(elem)
+            if len(tokens) <= 1:
+                continue
+
+            name, tok_args, tok_body = parse_macro(tokens)
+            if len(tok_body) > 0:
+                self.macros.add(name, tok_args, tok_body)
+
     def generate_c_cast(self, elem, **kwargs):
         show_elem(elem)
         children = list(elem.get_children())
@@ -974,7 +1231,7 @@ class BindingGenerator:
 
     def generate_integer(self, elem: Cursor, **kwargs):
         try:
-            val = list(elem.get_tokens())[0].spelling
+            val = self.token_cache.tokens(elem)[0].spelling
 
             val = val.replace('u', '')
             val = val.replace('ll', '')
@@ -996,7 +1253,7 @@ class BindingGenerator:
         return T.Constant(elem.spelling)
 
     def generate_float(self, elem, **kwargs):
-        toks = [t.spelling for t in elem.get_tokens()]
+        toks = self.token_cache.spellings(elem)
         assert len(toks) == 1
         return T.Constant(float(toks[0]))
 
@@ -1034,7 +1291,7 @@ class BindingGenerator:
         if toks is not None:
             log.debug(f'{toks}')
         else:
-            toks = [t.spelling for t in elem.get_tokens()]
+            toks = self.token_cache.spellings(elem)
             log.debug(f'{toks}')
 
         assert len(toks) > 0
@@ -1085,15 +1342,23 @@ class BindingGenerator:
 
     def dispatch(self, elem, depth=0, **kwargs):
         # log.debug(f'{d(depth)} {elem.kind}')
+        kind = elem.kind
 
-        fun = self.dispatcher.get(elem.kind, None)
+        fun = self.dispatcher.get(kind, None)
         if fun is None:
-            return show_elem(elem, print_fun=log.debug)
+            if self.profile is not None:
+                self.profile.record_unsupported(kind)
+
+            debug_elem(elem)
+            return None
+
+        if self.profile is not None:
+            return self.profile.timed(kind, fun, elem, depth=depth + 1, **kwargs)
 
         return fun(elem, depth=depth + 1, **kwargs)
 
     def process_builtin_macros(self, cursor: Cursor):
-        tokens = list(cursor.get_tokens())
+        tokens = self.token_cache.tokens(cursor)
         name, tok_args, tok_body = parse_macro(tokens)
 
         if len(tok_body) == 0:
@@ -1109,14 +1374,38 @@ class BindingGenerator:
 
         except UnsupportedExpression:
             self.unsupported_macros.add(name.spelling)
+            return
 
         self.definitions[name.spelling] = py_body
 
-    def generate(self, tu, guard=None):
+    def generate(self, tu, guard=None, incremental: IncrementalGeneration = None):
+        """Generate the bindings of a translation unit
+
+        Parameters
+        ----------
+        incremental: IncrementalGeneration
+            when provided, the statements generated for files that did not change since the last run
+            are reused instead of being generated again
+        """
         module: T.Module = Module()
-        module.body = []
+        module.body = list(self.iter_generate(tu, guard=guard, incremental=incremental))
+        return module
+
+    def iter_generate(self, tu, guard=None, incremental: IncrementalGeneration = None):
+        """Generate the bindings of a translation unit one top level statement at a time
 
-        children, builtin = sorted_children(tu.cursor)
+        Examples
+        --------
+        >>> from tide.generators.clang_utils import parse_clang
+        >>> tu, index = parse_clang('typedef int int32; float add(float a, float b);')
+        >>> for stmt in BindingGenerator().iter_generate(tu):
+        ...     print(unparse(stmt).strip())
+        int32 = c_int
+        add = _bind('add', [c_float, c_float], c_float, arg_names=['a', 'b'])
+        """
+        # elements outside of the guard are dropped while reading the children
+        children, files, builtin = sorted_children_files(tu.cursor, guard)
+        self.token_cache = TokenCache()
 
         assert len(builtin) > 0
         # Process every builtin macros
@@ -1130,49 +1419,261 @@ class BindingGenerator:
         # __BYTE_ORDER__ is defined by clang, __BYTE_ORDER is defined by other includes
         self.definitions['__BYTE_ORDER'] = self.definitions['__BYTE_ORDER__']
 
+        if incremental is not None:
+            incremental.start(tu)
+
+        self.collect_macros(children, incremental)
+
         log.debug(f'Processing {len(children)} children')
         elem: Cursor
-        for elem in children:
-            loc: SourceLocation = elem.location
+        for elem, filename in zip(children, files):
+            if incremental is not None:
+                if incremental.is_clean(filename):
+                    yield from incremental.replay(self, filename)
+                    continue
 
-            if loc.file is not None and guard is not None and not str(loc.file.name).startswith(guard):
-                continue
+                incremental.record(self, filename)
 
             try:
                 expr = self.dispatch(elem)
 
+                statements = []
                 if expr is not None and not isinstance(expr, str):
                     if isinstance(expr, list):
                         for e in expr:
-                            module.body.append(T.Expr(e))
+                            statements.append(T.Expr(e))
                     else:
-                        module.body.append(T.Expr(expr))
+                        statements.append(T.Expr(expr))
+
+                if incremental is not None:
+                    incremental.append(statements)
+
+                yield from statements
 
             except Unsupported:
                 log.debug(elem)
                 pass
 
-        return module
+        # only the evaluations of this run are needed by the next one
+        self.macros.previous = None
+
+        if incremental is not None:
+            incremental.stop(self)
+            incremental.macros = self.macros
+
+
+@dataclass
+class HeaderBindings:
+    """Bindings generated by a worker for a single file"""
+    header: str
+    body: List[T.Expr]
+    type_registry: dict
+    definitions: dict
+    renaming: dict
+    unsupported_macros: set
+    import_enum: bool
+    # interned nodes of the worker, pickled with the body so they keep their identity
+    types: list
+
+
+def library_files(tu, guard):
+    """Returns the files of the translation unit starting with guard,
+    the included files come before the files including them
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> with open(os.path.join(folder, 'a.h'), 'w') as f:
+    ...     _ = f.write('int a;')
+    >>> with open(os.path.join(folder, 'lib.h'), 'w') as f:
+    ...     _ = f.write('#include "a.h"\\n#include <stddef.h>\\nint b;')
+    >>> tu = clang.cindex.Index.create().parse(os.path.join(folder, 'lib.h'))
+    >>> [os.path.basename(f) for f in library_files(tu, folder)]
+    ['a.h', 'lib.h']
+    """
+    includes = dict()
+    for inclusion in tu.get_includes():
+        includes.setdefault(inclusion.source.name, []).append(inclusion.include.name)
+
+    files = []
+    visited = {tu.spelling}
+    stack = [(tu.spelling, iter(includes.get(tu.spelling, [])))]
+
+    while stack:
+        filename, remaining = stack[-1]
+        child = next(remaining, None)
 
+        if child is None:
+            stack.pop()
+            if filename.startswith(guard):
+                files.append(filename)
 
-def generate_bindings(module):
-    """Unparse a Python module containing the bindings"""
+        elif child not in visited:
+            visited.add(child)
+            stack.append((child, iter(includes.get(child, []))))
+
+    return files
+
+
+def share_children(node, shared):
+    """Replace the children of node by their shared version, shared maps id(node) to the shared node"""
+    for name, value in vars(node).items():
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                replacement = shared.get(id(item))
+
+                if replacement is not None:
+                    value[i] = replacement
+                elif hasattr(item, '__dict__'):
+                    share_children(item, shared)
+
+        elif hasattr(value, '__dict__'):
+            replacement = shared.get(id(value))
+
+            if replacement is not None:
+                setattr(node, name, replacement)
+            else:
+                share_children(value, shared)
+
+
+# translation units parsed by a worker process, the files of a header share its translation unit
+_worker_units = dict()
+
+
+def _generate_header(work) -> HeaderBindings:
+    header, filename = work
+
+    tu = _worker_units.get(header)
+    if tu is None:
+        index = clang.cindex.Index.create()
+        tu = index.parse(header, options=0x01)
+        _worker_units[header] = tu
+
+        for diag in tu.diagnostics:
+            log.debug(diag.format())
+
+    gen = BindingGenerator()
+    # only generate the declarations that belong to this file
+    # the other files are generated by their own worker
+    module = gen.generate(tu, guard=filename)
+
+    return HeaderBindings(
+        filename,
+        module.body,
+        gen.type_registry,
+        gen.definitions,
+        gen.renaming,
+        gen.unsupported_macros,
+        gen.import_enum,
+        list(gen.types.nodes.values())
+    )
+
+
+def write_bindings(statements, filename, prelude=None, epilogue=None):
+    """Unparse the statements one by one and flush them to the file as they are produced.
+    When given a generator the whole module is never held in memory.
+    The epilogue is written after the bindings, by default it reports the missing functions
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> from tide.generators.clang_utils import parse_clang
+    >>> tu, index = parse_clang('float add(float a, float b);')
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'add.py')
+    >>> write_bindings(BindingGenerator().iter_generate(tu), filename, prelude='', epilogue='')
+    >>> print(compact(open(filename).read()))
+    <BLANKLINE>
+    add = _bind('add', [c_float, c_float], c_float, arg_names=['a', 'b'])
+    <BLANKLINE>
+    """
+    if prelude is None:
+        prelude = sdl2_prelude()
+
+    if epilogue is None:
+        epilogue = sdl2_epilogue()
+
+    with open(filename, 'w') as f:
+        f.write(prelude)
+
+        for stmt in statements:
+            stmt_module = Module()
+            stmt_module.body = [stmt]
+            f.write(unparse(stmt_module))
+            f.flush()
+
+        f.write(epilogue)
+
+
+def sdl2_prelude(lazy=False):
+    """Imports and library loading code inserted at the top of the generated module
+
+    When ``lazy`` is set, functions are resolved on their first call instead of at import time
+    """
+    if lazy:
+        return (
+            """import os\n"""
+            """\n"""
+            """from tide.runtime.loader import DLL\n"""
+            """from tide.runtime.ctypes_ext import *\n"""
+            """_lib = DLL("SDL2", ["SDL2", "SDL2-2.0"], os.getenv("PYSDL2_DLL_PATH"), lazy=True)\n"""
+            """_bind = _lib.lazy_binder(globals())\n"""
+        )
+
+    return (
+        """import os\n"""
+        """\n"""
+        """from tide.runtime.loader import DLL\n"""
+        """from tide.runtime.ctypes_ext import *\n"""
+        """_lib = DLL("SDL2", ["SDL2", "SDL2-2.0"], os.getenv("PYSDL2_DLL_PATH"), bulk=True)\n"""
+        """_bind = _lib.bind_function\n"""
+    )
+
+
+def sdl2_epilogue(lazy=False):
+    """Code inserted at the end of the generated module,
+    the functions missing from the library are reported once all of them are bound
+    """
+    if lazy:
+        return ''
+
+    return """\n_lib.report_missing()\n"""
+
+
+def generate_bindings(module, lazy=False, fold_constants=False):
+    """Unparse a Python module containing the bindings
+
+    Parameters
+    ----------
+    module: Module or Iterable
+        the module holding the bindings or an iterable of top level statements
+
+    lazy: bool
+        emit bindings that resolve the C functions on first call, this makes importing the module much faster
+
+    fold_constants: bool
+        replace constant expressions by their value so they are not computed at import time
+    """
     import os
 
     dirname = os.path.dirname(__file__)
 
-    with open(os.path.join(dirname, '..', '..', 'output', 'sdl2.py'), 'w') as f:
-        f.write("""import os\n""")
-        f.write("""\n""")
-        f.write("""from tide.runtime.loader import DLL\n""")
-        f.write("""from tide.runtime.ctypes_ext import *\n""")
-        f.write("""_lib = DLL("SDL2", ["SDL2", "SDL2-2.0"], os.getenv("PYSDL2_DLL_PATH"))\n""")
-        f.write("""_bind = _lib.bind_function\n""")
-        f.write(unparse(module))
+    statements = module
+    if isinstance(module, Module):
+        statements = module.body
+
+    if fold_constants:
+        statements = ConstantFolding().fold_statements(statements)
+
+    write_bindings(
+        statements,
+        os.path.join(dirname, '..', '..', 'output', 'sdl2.py'),
+        prelude=sdl2_prelude(lazy),
+        epilogue=sdl2_epilogue(lazy))
 
 
 def generate_sdl2_bindings():
-    bindings = BindingGenerator.run('/usr/include/SDL2/SDL.h')
+    bindings = BindingGenerator.run('/usr/include/SDL2/SDL.h', cache=TranslationUnitCache(), stream=True)
     generate_bindings(bindings)
 
 
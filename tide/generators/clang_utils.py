@@ -1,11 +1,24 @@
-from typing import Tuple
+import atexit
+import hashlib
+import json
+import logging
+import os
+from typing import List, Optional, Tuple
 import re
+import shutil
+import sys
+import tempfile
 
 import clang.cindex
-from clang.cindex import TranslationUnit, Index, CursorKind, Cursor
+from clang.cindex import TranslationUnit, Index, CursorKind, Cursor, Type, Token, TokenKind
+from clang.cindex import Diagnostic, SourceLocation
+from clang.cindex import TranslationUnitLoadError, TranslationUnitSaveError
 
 
 from tide.generators.debug import show_elem, traverse
+from tide.utils.cache import cache_dir
+
+log = logging.getLogger('TIDE')
 
 
 def is_not_builtin(elem):
@@ -16,7 +29,7 @@ def no_builtin(children):
     return filter(is_not_builtin, children)
 
 
-def parse_clang(code, ext='c', source='temporary_buffer_1234') -> Tuple[TranslationUnit, Index]:
+def parse_clang(code, ext='c', source='temporary_buffer_1234', args=None) -> Tuple[TranslationUnit, Index]:
     """Parse C code using clang, returns a translation unit
 
     Examples
@@ -29,17 +42,314 @@ def parse_clang(code, ext='c', source='temporary_buffer_1234') -> Tuple[Translat
     """
     fname = f'{source}.{ext}'
     index = clang.cindex.Index.create()
-    tu = index.parse(path=fname, unsaved_files=[(fname, code)], options=0x01)
+    tu = index.parse(path=fname, args=args, unsaved_files=[(fname, code)], options=0x01)
     return tu, index
 
 
+def file_signature(filename):
+    """Cheap signature used to detect when a file was modified"""
+    stat = os.stat(filename)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _cached_token(spelling, kind):
+    if kind is not None:
+        kind = TokenKind.from_value(kind)
+
+    return CachedToken(sys.intern(spelling), kind)
+
+
+class CachedToken:
+    """Spelling and kind of a token read once from libclang, unlike libclang tokens
+    reading them does not call into libclang and they can be pickled
+
+    Examples
+    --------
+    >>> import pickle
+    >>> tok = pickle.loads(pickle.dumps(CachedToken('SDL_INIT_VIDEO', TokenKind.IDENTIFIER)))
+    >>> tok.spelling, tok.kind is TokenKind.IDENTIFIER
+    ('SDL_INIT_VIDEO', True)
+    """
+    __slots__ = ('spelling', 'kind')
+
+    def __init__(self, spelling: str, kind: TokenKind):
+        self.spelling = spelling
+        self.kind = kind
+
+    def __reduce__(self):
+        # TokenKind are registered singletons, only send their value
+        kind = self.kind
+        if kind is not None:
+            kind = kind.value
+
+        return _cached_token, (self.spelling, kind)
+
+    def __repr__(self):
+        return f'\'{self.spelling}\''
+
+
+def compact_tokens(tokens) -> Tuple[CachedToken, ...]:
+    """Convert libclang tokens to :class:`CachedToken`, other tokens are kept as is
+
+    Examples
+    --------
+    >>> tu, index = parse_clang('#define A (1 << 2)')
+    >>> macro = list(no_builtin(tu.cursor.get_children()))[0]
+    >>> compact_tokens(macro.get_tokens())
+    ('A', '(', '1', '<<', '2', ')')
+    """
+    return tuple(CachedToken(sys.intern(t.spelling), t.kind) if isinstance(t, Token) else t for t in tokens)
+
+
+class TokenCache:
+    """Tokenize each cursor once, accessing the spelling of a libclang token is a call into libclang
+    and the macro processing reads each spelling many times.
+    The spellings are interned so tokens sharing a spelling share the same string.
+
+    Examples
+    --------
+    >>> tu, index = parse_clang('#define A (1 << 2)')
+    >>> macro = list(no_builtin(tu.cursor.get_children()))[0]
+    >>> cache = TokenCache()
+    >>> cache.spellings(macro)
+    ['A', '(', '1', '<<', '2', ')']
+    >>> cache.tokens(macro) is cache.tokens(macro)
+    True
+    >>> cache.hits, cache.misses
+    (2, 1)
+    """
+
+    def __init__(self):
+        self.cache = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def tokens(self, cursor: Cursor) -> Tuple[CachedToken, ...]:
+        tokens = self.cache.get(cursor)
+
+        if tokens is None:
+            self.misses += 1
+            tokens = compact_tokens(cursor.get_tokens())
+            self.cache[cursor] = tokens
+        else:
+            self.hits += 1
+
+        return tokens
+
+    def spellings(self, cursor: Cursor) -> List[str]:
+        return [t.spelling for t in self.tokens(cursor)]
+
+
+class TranslationUnitCache:
+    """Keep parsed translation units on disk so unchanged headers do not need to be parsed again
+
+    Translation units are saved using clang AST serialization and are keyed by the header path,
+    the compile arguments and the parse options.
+    A manifest holding the modification time and size of every file included by the TU
+    is saved alongside, the cached TU is discarded as soon as one of those files changes.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> header = os.path.join(folder, 'point.h')
+    >>> with open(header, 'w') as f:
+    ...     _ = f.write('struct Point { float x, y; };')
+    >>> cache = TranslationUnitCache(os.path.join(folder, 'cache'))
+    >>> tu = cache.parse(Index.create(), header)
+    >>> tu = cache.parse(Index.create(), header)
+    >>> for elem in no_builtin(tu.cursor.get_children()):
+    ...     print(elem.spelling, elem.kind)
+    Point CursorKind.STRUCT_DECL
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+
+    def __init__(self, folder=None):
+        if folder is None:
+            folder = cache_dir('tu')
+
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    @staticmethod
+    def key(filename, args, options) -> str:
+        h = hashlib.sha256()
+        h.update(os.path.abspath(filename).encode('utf-8'))
+        h.update(json.dumps([list(args), options]).encode('utf-8'))
+        return h.hexdigest()
+
+    def is_valid(self, manifest_file) -> bool:
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+
+            for filename, signature in manifest['files'].items():
+                if file_signature(filename) != signature:
+                    log.debug(f'{filename} changed, discarding cached translation unit')
+                    return False
+
+        except (OSError, ValueError, KeyError):
+            return False
+
+        return True
+
+    def save(self, tu: TranslationUnit, filename, ast_file, manifest_file):
+        files = [filename]
+        for include in tu.get_includes():
+            files.append(include.include.name)
+
+        manifest = dict(files={name: file_signature(name) for name in files})
+
+        try:
+            tu.save(ast_file)
+        except TranslationUnitSaveError as err:
+            log.debug(f'Could not save translation unit for {filename}: {err}')
+            return
+
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f)
+
+    def parse(self, index: Index, filename, args=None, options=0x01) -> TranslationUnit:
+        """Load the translation unit from the cache if still up to date, parse it otherwise"""
+        if args is None:
+            args = []
+
+        key = self.key(filename, args, options)
+        ast_file = os.path.join(self.folder, f'{key}.ast')
+        manifest_file = os.path.join(self.folder, f'{key}.json')
+
+        if os.path.exists(ast_file) and self.is_valid(manifest_file):
+            try:
+                tu = index.read(ast_file)
+                self.hits += 1
+                return tu
+            except TranslationUnitLoadError:
+                log.debug(f'Could not load cached translation unit {ast_file}')
+
+        self.misses += 1
+        tu = index.parse(filename, args=args, options=options)
+        self.save(tu, filename, ast_file, manifest_file)
+        return tu
+
+
+class PrecompiledHeaders:
+    """Precompile the headers included by the expressions we parse so the header is parsed only once
+    instead of once per expression
+
+    Examples
+    --------
+    >>> headers = PrecompiledHeaders()
+    >>> pch = headers.get('stdint.h')
+    >>> pch == headers.get('stdint.h')
+    True
+    >>> tu, _ = parse_clang('int8_t x = INT8_MAX;', args=['-include-pch', pch])
+    >>> for elem in no_builtin(tu.cursor.get_children()):
+    ...     if elem.spelling == 'x':
+    ...         print(elem.spelling, elem.type.spelling)
+    x int8_t
+    """
+
+    languages = {
+        'c': 'c-header',
+        'cpp': 'c++-header',
+    }
+
+    def __init__(self, folder=None):
+        if folder is None:
+            folder = tempfile.mkdtemp(prefix='tide_pch_')
+            # the precompiled headers are only valid for this process
+            atexit.register(shutil.rmtree, folder, True)
+
+        self.folder = folder
+        self.headers = dict()
+        self.index = Index.create()
+
+    def get(self, include, ext='c') -> Optional[str]:
+        """Returns the precompiled header for the include, None if it could not be built"""
+        key = (include, ext)
+
+        if key not in self.headers:
+            self.headers[key] = self.build(include, ext)
+
+        return self.headers[key]
+
+    def build(self, include, ext) -> Optional[str]:
+        fname = f'tide_pch_{len(self.headers)}.h'
+        pch = os.path.join(self.folder, f'{fname}.pch')
+        language = self.languages.get(ext, 'c-header')
+
+        tu = self.index.parse(
+            path=fname,
+            args=['-x', language],
+            unsaved_files=[(fname, f'#include <{include}>\n')],
+            # incomplete: do not finalize the TU so it can be used as a header
+            options=0x01 | TranslationUnit.PARSE_INCOMPLETE)
+
+        # an include that cannot be parsed is included textually so its errors are reported
+        for diag in tu.diagnostics:
+            if diag.severity >= Diagnostic.Error:
+                log.debug(f'Could not precompile {include}: {diag.format()}')
+                return None
+
+        try:
+            tu.save(pch)
+        except TranslationUnitSaveError as err:
+            log.debug(f'Could not precompile {include}: {err}')
+            return None
+
+        return pch
+
+
+_precompiled_headers = None
+
+
+def precompiled_headers() -> PrecompiledHeaders:
+    global _precompiled_headers
+
+    if _precompiled_headers is None:
+        _precompiled_headers = PrecompiledHeaders()
+
+    return _precompiled_headers
+
+
+def include_sources(include, ext, precompiled):
+    """Returns the source lines and the arguments needed to include a header"""
+    if include is None:
+        return [], None
+
+    if precompiled:
+        pch = precompiled_headers().get(include, ext)
+
+        if pch is not None:
+            return [], ['-include-pch', pch]
+
+    return [f'#include <{include}>'], None
+
+
 class ParsingError(Exception):
     pass
 
 
-def parse_c_expression(expression, include=None, ext='c', source='temporary_buffer_1234', header=None) -> Tuple[Cursor, Cursor, TranslationUnit]:
+def generated_function(tu, line) -> Optional[Cursor]:
+    """Returns the function generated at the start of ``line`` of the parsed source.
+    The function is found from its location, the declarations of the included headers are not visited
+    """
+    location = SourceLocation.from_position(tu, tu.get_file(tu.spelling), line, len('void ') + 1)
+    cursor = Cursor.from_location(tu, location)
+
+    if cursor is None or cursor.kind != CursorKind.FUNCTION_DECL:
+        return None
+
+    return cursor
+
+
+def parse_c_expression(expression, include=None, ext='c', source='temporary_buffer_1234', header=None, precompiled=True) -> Tuple[Cursor, Cursor, TranslationUnit]:
     """Hack the clang parser to parse a single expression
-    This is used to parse macros and generate corresponding function when possible
+    This is used to parse macros and generate corresponding function when possible.
+    When ``precompiled`` is set the include is precompiled once and reused for the following expressions
 
     Examples
     --------
@@ -68,37 +378,42 @@ def parse_c_expression(expression, include=None, ext='c', source='temporary_buff
     >>> traverse(expr)
     None
     """
-    sources = []
-    if include is not None:
-        sources.append(f'#include <{include}>')
+    sources, args = include_sources(include, ext, precompiled)
 
     if header is None:
         header = ''
 
+    line = sum(s.count('\n') + 1 for s in sources) + 1
     sources.append(f'void fun_023984() {{ {header}; auto x_203234234 = {expression}; }}')
     sources = '\n'.join(sources)
 
-    tu, _ = parse_clang(sources, ext=ext, source=source)
-    function = list(tu.cursor.get_children())[-1]
+    tu, _ = parse_clang(sources, ext=ext, source=source, args=args)
+    function = generated_function(tu, line)
 
-    assert function.kind == CursorKind.FUNCTION_DECL
+    assert function is not None
     assert function.spelling == 'fun_023984'
 
+    expr, result_type = fetch_expression(function, 'x_203234234')
+    return expr, result_type, tu
+
+
+def fetch_expression(function: Cursor, variable) -> Tuple[Cursor, Type]:
+    """Find the expression assigned to ``variable`` inside the body of ``function``"""
     children = list(function.get_children())
     child = None
 
     while len(children) > 0:
         child = children.pop()
 
-        if child.kind == CursorKind.VAR_DECL and child.spelling == 'x_203234234':
+        if child.kind == CursorKind.VAR_DECL and child.spelling == variable:
             break
 
         else:
             for c in child.get_children():
                 children.append(c)
 
-    if child.spelling != 'x_203234234':
-        return None, None, tu
+    if child is None or child.spelling != variable:
+        return None, None
 
     result_type = child.type
     children = list(child.get_children())
@@ -109,7 +424,95 @@ def parse_c_expression(expression, include=None, ext='c', source='temporary_buff
     else:
         result_type = None
 
-    return expr, result_type, tu
+    return expr, result_type
+
+
+def parse_c_expressions(expressions, include=None, ext='c', source='temporary_buffer_1234', headers=None, precompiled=True) -> Tuple[List[Tuple[Cursor, Type]], TranslationUnit]:
+    """Parse a batch of expressions using a single translation unit so the include is only parsed once.
+    Each expression lives in its own function so a broken expression does not affect its neighbours
+
+    Examples
+    --------
+    >>> results, _ = parse_c_expressions(['((char)0x7F)', '1 + 2.0', '__attribute__((deprecated))'])
+    >>> for expr, type in results:
+    ...     print(expr.kind if expr else None, type.kind if type else None)
+    CursorKind.UNEXPOSED_EXPR TypeKind.INT
+    CursorKind.UNEXPOSED_EXPR TypeKind.INT
+    None None
+    """
+    sources, args = include_sources(include, ext, precompiled)
+
+    if headers is None:
+        headers = [''] * len(expressions)
+
+    lines = []
+    line = sum(s.count('\n') + 1 for s in sources) + 1
+
+    for i, (expression, header) in enumerate(zip(expressions, headers)):
+        function = f'void fun_023984_{i}() {{ {header}; auto x_{i} = {expression}; }}'
+        sources.append(function)
+        lines.append(line)
+        line += function.count('\n') + 1
+
+    sources = '\n'.join(sources)
+    tu, _ = parse_clang(sources, ext=ext, source=source, args=args)
+
+    results = []
+    for i, line in enumerate(lines):
+        function = generated_function(tu, line)
+
+        if function is None or function.spelling != f'fun_023984_{i}':
+            results.append((None, None))
+            continue
+
+        results.append(fetch_expression(function, f'x_{i}'))
+
+    return results, tu
+
+
+def diagnostics_by_expression(tu, count):
+    """Group the diagnostics of a batch by the expression they were raised for,
+    only the diagnostics of the generated source are kept, not the ones of the included headers
+
+    Examples
+    --------
+    >>> _, tu = parse_c_expressions(['1', 'X'], include='stdint.h', precompiled=False)
+    >>> for diagnostics in diagnostics_by_expression(tu, 2):
+    ...     print([d.split(' error: ')[-1] for d in diagnostics if 'undeclared' in d])
+    []
+    ["use of undeclared identifier 'X'"]
+    """
+    # expression of each line of the source, found from the function starting on or before the line
+    lines = dict()
+
+    def expression_at(line):
+        if line not in lines:
+            lines[line] = None
+
+            for start in range(line, 0, -1):
+                function = generated_function(tu, start)
+
+                if function is None:
+                    continue
+
+                if function.spelling.startswith('fun_023984_') and function.extent.end.line >= line:
+                    lines[line] = int(function.spelling[len('fun_023984_'):])
+                break
+
+        return lines[line]
+
+    diagnostics = [[] for _ in range(count)]
+    for diag in tu.diagnostics:
+        file = diag.location.file
+        if file is None or file.name != tu.spelling:
+            continue
+
+        i = expression_at(diag.location.line)
+
+        if i is not None:
+            diagnostics[i].append(diag.format())
+
+    return diagnostics
 
 
 undeclared_identifier_error = \
@@ -167,6 +570,63 @@ def parse_c_expression_recursive(expression, include=None, ext='c', source='temp
     return e, t, tu
 
 
+def parse_c_expressions_recursive(expressions, include=None, ext='c', source='temporary_buffer_1234') -> Tuple[List[Tuple[Cursor, Type]], TranslationUnit]:
+    """Batched version of :func:`parse_c_expression_recursive`, the include is parsed twice
+    for the entire batch instead of twice per expression
+
+    Examples
+    --------
+    >>> results, _ = parse_c_expressions_recursive(['((X) * (X))', '(Y << 2)'])
+    >>> for expr, _ in results:
+    ...     traverse(expr)
+    CursorKind.PAREN_EXPR
+     CursorKind.BINARY_OPERATOR
+      CursorKind.UNEXPOSED_EXPR
+       CursorKind.PAREN_EXPR
+        CursorKind.DECL_REF_EXPR
+      CursorKind.UNEXPOSED_EXPR
+       CursorKind.PAREN_EXPR
+        CursorKind.DECL_REF_EXPR
+    CursorKind.PAREN_EXPR
+     CursorKind.BINARY_OPERATOR
+      CursorKind.UNEXPOSED_EXPR
+       CursorKind.DECL_REF_EXPR
+      CursorKind.INTEGER_LITERAL
+    """
+    _, tu = parse_c_expressions(expressions, include, ext, source)
+
+    headers = []
+    for diagnostics in diagnostics_by_expression(tu, len(expressions)):
+        undeclared_identifiers = set()
+
+        for diag in diagnostics:
+            match = undeclared_identifier_error.match(diag)
+
+            if match is not None:
+                undeclared_identifiers.add(match.groupdict()['identifier'])
+
+        headers.append(' '.join(f'auto {i};' for i in sorted(undeclared_identifiers)))
+
+    results, tu = parse_c_expressions(expressions, include, ext, source, headers)
+
+    for i, diagnostics in enumerate(diagnostics_by_expression(tu, len(expressions))):
+        if is_diagnostic_type_wrong(diagnostics):
+            results[i] = (results[i][0], None)
+
+    return results, tu
+
+
+def is_diagnostic_type_wrong(diagnostics):
+    for diag in diagnostics:
+        if missing_type_specifier.match(diag) is not None:
+            return True
+
+        if implicit_conversion.match(diag) is not None:
+            return True
+
+    return False
+
+
 def is_type_wrong(tu):
     for diag in tu.diagnostics:
         match = missing_type_specifier.match(diag.format())
@@ -0,0 +1,423 @@
+import ast
+import ctypes
+from fractions import Fraction
+import logging
+import operator
+from typing import Iterable, Optional, Tuple, Union
+
+from tide.generators.macros import integer_operators, integer_unary_operators, MAX_SHIFT
+import tide.generators.nodes as T
+
+log = logging.getLogger('TIDE')
+
+
+# float operators, only folded when the result is exact
+exact_operators = {
+    T.Add: operator.add,
+    T.Sub: operator.sub,
+    T.Mult: operator.mul,
+    T.Div: operator.truediv,
+}
+
+integer_types = {
+    'c_byte', 'c_ubyte', 'c_short', 'c_ushort', 'c_int', 'c_uint', 'c_long', 'c_ulong',
+    'c_longlong', 'c_ulonglong', 'c_int8', 'c_uint8', 'c_int16', 'c_uint16', 'c_int32', 'c_uint32',
+    'c_int64', 'c_uint64', 'c_size_t', 'c_ssize_t',
+}
+
+
+def integer_bits(ctype: str) -> int:
+    return ctypes.sizeof(getattr(ctypes, ctype)) * 8
+
+
+def is_unsigned(ctype: str) -> bool:
+    return ctype.startswith('c_u') or ctype == 'c_size_t'
+
+
+def integer_range(ctype: str):
+    """Returns the range of values of a ctypes integer type
+
+    Examples
+    --------
+    >>> integer_range('c_uint8')
+    (0, 255)
+    >>> integer_range('c_int16')
+    (-32768, 32767)
+    """
+    bits = integer_bits(ctype)
+
+    if is_unsigned(ctype):
+        return 0, 2 ** bits - 1
+
+    return -2 ** (bits - 1), 2 ** (bits - 1) - 1
+
+
+def promote(ctype: str) -> str:
+    """Integer promotion, the types smaller than int are computed as int"""
+    if integer_bits(ctype) < integer_bits('c_int'):
+        return 'c_int'
+
+    return ctype
+
+
+def literal_type(value: int) -> Optional[str]:
+    """Type of an integer literal, None if it does not fit in a long long"""
+    for ctype in ('c_int', 'c_long', 'c_longlong'):
+        low, high = integer_range(ctype)
+
+        if low <= value <= high:
+            return ctype
+
+    return None
+
+
+def common_type(left: str, right: str) -> str:
+    """Usual arithmetic conversions of two promoted integer types
+
+    Examples
+    --------
+    >>> common_type('c_uint', 'c_int')
+    'c_uint'
+    >>> common_type('c_uint', 'c_int64')
+    'c_int64'
+    """
+    if is_unsigned(left) == is_unsigned(right):
+        return left if integer_bits(left) >= integer_bits(right) else right
+
+    unsigned, signed = (left, right) if is_unsigned(left) else (right, left)
+
+    if integer_bits(unsigned) >= integer_bits(signed):
+        return unsigned
+
+    return signed
+
+
+def convert(value: int, ctype: str) -> Optional[int]:
+    """Convert the value to the type like C does, unsigned types wrap around,
+    None if the value overflows a signed type
+
+    Examples
+    --------
+    >>> convert(-1, 'c_uint32')
+    4294967295
+    >>> convert(2 ** 31, 'c_int32') is None
+    True
+    """
+    low, high = integer_range(ctype)
+
+    if is_unsigned(ctype):
+        return value % (high + 1)
+
+    if low <= value <= high:
+        return value
+
+    return None
+
+
+def c_division(left: int, right: int, op) -> Optional[int]:
+    """Integer division and remainder of C, which truncate toward zero"""
+    if right == 0:
+        return None
+
+    quotient = abs(left) // abs(right)
+    if (left < 0) != (right < 0):
+        quotient = -quotient
+
+    if op is T.Div:
+        return quotient
+
+    return left - right * quotient
+
+
+def is_number(value):
+    # bool is an int but True | 1 is not a constant we want to fold
+    return type(value) in (int, float)
+
+
+class ConstantFolding:
+    """Replace the constant expressions of a generated module by their value, so they are not
+    computed again each time the module is imported.
+
+    Integer arithmetic, bit operations and shifts are folded, the names of the constants assigned
+    earlier in the module are replaced by their value.
+    Casts to ctypes integer types are folded to a plain integer if the value fits in the type,
+    the type is kept so the operations using the cast follow C rules: unsigned values wrap around
+    and an expression overflowing a signed type is left untouched.
+    Integer division and remainder truncate toward zero like in C.
+    Float operations are only folded when their result is exact.
+
+    Examples
+    --------
+    >>> from tide.generators.clang_utils import parse_clang
+    >>> from tide.generators.binding_generator import BindingGenerator, compact, unparse
+    >>> tu, index = parse_clang(''
+    ... 'typedef unsigned int Uint32;\\n'
+    ... 'typedef int Sint32;\\n'
+    ... '#define A ((Uint32)0x80)\\n'
+    ... '#define B (1 << 4)\\n'
+    ... '#define C (A | B)\\n'
+    ... '#define D (3 / 2)\\n'
+    ... '#define E (1 / 3.0)\\n'
+    ... '#define F (~((Uint32)0))\\n'
+    ... '#define G (-((Uint32)1))\\n'
+    ... '#define H (((Uint32)0) - 1)\\n'
+    ... '#define I (((Uint32)0xFFFFFFFF) + 1)\\n'
+    ... '#define J (((Sint32)0x7FFFFFFF) + 1)\\n'
+    ... '#define K (-7 % 2)\\n'
+    ... )
+    >>> module = ConstantFolding().generate(BindingGenerator().generate(tu))
+    >>> print(compact(unparse(module)))
+    <BLANKLINE>
+    Uint32 = c_uint
+    <BLANKLINE>
+    Sint32 = c_int
+    <BLANKLINE>
+    A = 128
+    <BLANKLINE>
+    B = 16
+    <BLANKLINE>
+    C = 144
+    <BLANKLINE>
+    D = 1
+    <BLANKLINE>
+    E = (1 / 3.0)
+    <BLANKLINE>
+    F = 4294967295
+    <BLANKLINE>
+    G = 4294967295
+    <BLANKLINE>
+    H = 4294967295
+    <BLANKLINE>
+    I = 0
+    <BLANKLINE>
+    J = (Sint32(2147483647) + 1)
+    <BLANKLINE>
+    K = -1
+    <BLANKLINE>
+    """
+
+    def __init__(self):
+        # value and C type of the constants assigned so far, the type is None for python values
+        self.values = dict()
+        # names bound to a ctypes integer type
+        self.types = {name: name for name in integer_types}
+        self.folded = 0
+
+    def generate(self, module: T.Module) -> T.Module:
+        module.body = list(self.fold_statements(module.body))
+        return module
+
+    def fold_statements(self, statements: Iterable) -> Iterable:
+        """Fold the statements one at a time, this can be used on the bindings streamed by the generator"""
+        for stmt in statements:
+            self.statement(stmt)
+            yield stmt
+
+    def statement(self, stmt):
+        expr = stmt
+        if isinstance(stmt, T.Expr):
+            expr = stmt.value
+
+        # typedefs are generated as ast.Assign
+        if not isinstance(expr, (T.Assign, ast.Assign)):
+            # the module defines a class or a function with that name
+            name = getattr(expr, 'name', None)
+            self.values.pop(name, None)
+            self.types.pop(name, None)
+            return
+
+        for target in expr.targets:
+            if isinstance(target, T.Name):
+                self.values.pop(target.id, None)
+                self.types.pop(target.id, None)
+
+        if len(expr.targets) != 1 or not isinstance(expr.targets[0], T.Name):
+            return
+
+        name = expr.targets[0].id
+
+        # type alias
+        if isinstance(expr.value, T.Name) and expr.value.id in self.types:
+            self.types[name] = self.types[expr.value.id]
+            return
+
+        result = self.evaluate(expr.value)
+        if result is None:
+            return
+
+        if not isinstance(expr.value, T.Constant):
+            expr.value = T.Constant(result[0])
+            self.folded += 1
+
+        self.values[name] = result
+
+    def fold(self, node) -> Optional[Union[int, float]]:
+        """Returns the value of a constant expression, None if it cannot be computed exactly"""
+        result = self.evaluate(node)
+
+        if result is None:
+            return None
+
+        return result[0]
+
+    def evaluate(self, node) -> Optional[Tuple[Union[int, float], Optional[str]]]:
+        """Returns the value of a constant expression with its C type,
+        the type is None when the expression does not involve a cast and follows python semantics
+        """
+        if isinstance(node, T.Constant):
+            if is_number(node.value):
+                return node.value, None
+            return None
+
+        if isinstance(node, T.Name):
+            return self.values.get(node.id)
+
+        if isinstance(node, T.UnaryOp):
+            return self.fold_unary(node)
+
+        if isinstance(node, T.BinOp):
+            return self.fold_binary(node)
+
+        if isinstance(node, T.Call):
+            return self.fold_cast(node)
+
+        return None
+
+    def fold_unary(self, node: T.UnaryOp):
+        fun = integer_unary_operators.get(type(node.op))
+        operand = self.evaluate(node.operand)
+
+        if fun is None or operand is None:
+            return None
+
+        value, ctype = operand
+        if isinstance(node.op, T.Invert) and type(value) is not int:
+            return None
+
+        if ctype is None:
+            return fun(value), None
+
+        ctype = promote(ctype)
+        value = convert(fun(value), ctype)
+
+        if value is None:
+            return None
+
+        return value, ctype
+
+    def fold_binary(self, node: T.BinOp):
+        left = self.evaluate(node.left)
+        if left is None:
+            return None
+
+        right = self.evaluate(node.right)
+        if right is None:
+            return None
+
+        (left, left_type), (right, right_type) = left, right
+
+        op = type(node.op)
+        if type(left) is int and type(right) is int and (left_type is not None or right_type is not None):
+            return self.fold_typed_binary(op, left, left_type, right, right_type)
+
+        # integer division and remainder truncate toward zero in C, python floors or returns a float
+        if type(left) is int and type(right) is int and op in (T.Div, T.Mod):
+            value = c_division(left, right, op)
+
+            if value is None:
+                return None
+
+            return value, None
+
+        if type(left) is int and type(right) is int and op in integer_operators:
+            if op is T.LShift and right > MAX_SHIFT:
+                return None
+
+            # shifting a negative value is undefined or implementation defined in C
+            if op in (T.LShift, T.RShift) and left < 0:
+                return None
+
+            try:
+                return integer_operators[op](left, right), None
+            except (ValueError, ZeroDivisionError):
+                return None
+
+        fun = exact_operators.get(op)
+        if fun is None:
+            return None
+
+        try:
+            result = fun(left, right)
+            exact = fun(Fraction(left), Fraction(right))
+        except (ZeroDivisionError, OverflowError):
+            return None
+
+        if isinstance(result, float) and Fraction(result) != exact:
+            return None
+
+        return result, None
+
+    def fold_typed_binary(self, op, left: int, left_type: Optional[str], right: int, right_type: Optional[str]):
+        """Integer operation involving a cast, computed in the type C would use"""
+        if left_type is None:
+            left_type = literal_type(left)
+
+        if right_type is None:
+            right_type = literal_type(right)
+
+        if left_type is None or right_type is None:
+            return None
+
+        left_type, right_type = promote(left_type), promote(right_type)
+
+        # the type of a shift is the type of its left operand
+        if op in (T.LShift, T.RShift):
+            if not 0 <= right < integer_bits(left_type) or left < 0:
+                return None
+
+            ctype = left_type
+            value = integer_operators[op](left, right)
+
+        else:
+            ctype = common_type(left_type, right_type)
+            left, right = convert(left, ctype), convert(right, ctype)
+
+            if left is None or right is None:
+                return None
+
+            if op in (T.Div, T.Mod):
+                value = c_division(left, right, op)
+
+            elif op in integer_operators:
+                value = integer_operators[op](left, right)
+
+            else:
+                return None
+
+        if value is None:
+            return None
+
+        value = convert(value, ctype)
+        if value is None:
+            return None
+
+        return value, ctype
+
+    def fold_cast(self, node: T.Call):
+        if not isinstance(node.func, T.Name) or len(node.args) != 1 or node.keywords:
+            return None
+
+        ctype = self.types.get(node.func.id)
+        if ctype is None:
+            return None
+
+        result = self.evaluate(node.args[0])
+        if result is None or type(result[0]) is not int:
+            return None
+
+        value = result[0]
+        low, high = integer_range(ctype)
+        if not low <= value <= high:
+            return None
+
+        return value, ctype
@@ -1,3 +1,4 @@
+from collections import defaultdict
 import signal
 import time
 
@@ -117,6 +118,78 @@ def show_elem(elem: Cursor, print_fun=print):
             new_print('   ', attr_name, attr)
 
 
+def debug_elem(elem):
+    """Show the element in the debug log, nothing is formatted if debug logging is disabled"""
+    if log.isEnabledFor(logging.DEBUG):
+        show_elem(elem, print_fun=log.debug)
+
+
+class DispatchProfile:
+    """Collect per CursorKind statistics of the binding generator dispatch
+
+    Times are inclusive, the time spent dispatching the children of an element
+    is also accounted to the element itself.
+
+    Examples
+    --------
+    >>> profile = DispatchProfile()
+    >>> profile.record(CursorKind.FUNCTION_DECL, 0.5)
+    >>> profile.record(CursorKind.FUNCTION_DECL, 0.25)
+    >>> profile.record_unsupported(CursorKind.STATIC_ASSERT)
+    >>> profile.as_dict()['calls']
+    {'FUNCTION_DECL': 2}
+    >>> print(profile.report())
+    Kind                                Calls    Time (s)   Avg (us)
+    FUNCTION_DECL                           2      0.7500  375000.00
+    <BLANKLINE>
+    Unsupported                         Count
+    STATIC_ASSERT                           1
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.time = defaultdict(float)
+        self.unsupported = defaultdict(int)
+
+    def record(self, kind, elapsed):
+        self.calls[kind] += 1
+        self.time[kind] += elapsed
+
+    def record_unsupported(self, kind):
+        self.unsupported[kind] += 1
+
+    def timed(self, kind, fun, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fun(*args, **kwargs)
+        finally:
+            self.record(kind, time.perf_counter() - start)
+
+    def as_dict(self):
+        return dict(
+            calls={k.name: v for k, v in self.calls.items()},
+            time={k.name: v for k, v in self.time.items()},
+            unsupported={k.name: v for k, v in self.unsupported.items()},
+        )
+
+    def report(self) -> str:
+        lines = [f'{"Kind":<30} {"Calls":>10} {"Time (s)":>11} {"Avg (us)":>10}']
+
+        for kind in sorted(self.calls, key=lambda k: self.time[k], reverse=True):
+            calls = self.calls[kind]
+            elapsed = self.time[kind]
+            lines.append(f'{kind.name:<30} {calls:>10} {elapsed:>11.4f} {elapsed * 1e6 / calls:>10.2f}')
+
+        if self.unsupported:
+            lines.append('')
+            lines.append(f'{"Unsupported":<30} {"Count":>10}')
+
+            for kind, count in sorted(self.unsupported.items(), key=lambda item: item[1], reverse=True):
+                lines.append(f'{kind.name:<30} {count:>10}')
+
+        return '\n'.join(lines)
+
+
 def traverse(elem: Cursor, depth: int = 0, print_fun=print):
     indent = ' ' * depth
 
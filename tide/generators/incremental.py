@@ -0,0 +1,255 @@
+from collections import defaultdict
+import copy
+from dataclasses import dataclass, field
+import logging
+import pickle
+from typing import Any, Dict, List, Optional, Set
+
+from clang.cindex import CursorKind, TranslationUnit
+
+from tide.generators.clang_utils import file_signature
+
+log = logging.getLogger('TIDE')
+
+
+@dataclass
+class Segment:
+    """Contiguous run of elements of a single file and everything they contributed"""
+    start: int
+    body: List[Any] = field(default_factory=list)
+    type_registry: Dict[str, Any] = field(default_factory=dict)
+    definitions: Dict[str, Any] = field(default_factory=dict)
+    renaming: Dict[str, Any] = field(default_factory=dict)
+    unsupported_macros: Set[str] = field(default_factory=set)
+    import_enum: bool = False
+
+
+@dataclass
+class FileFragment:
+    """Everything a single source file contributed to the generated module.
+    Elements of a file can be interleaved with the elements of other files,
+    the segments remember where each run of elements started so the original order can be restored
+    """
+    signature: List[int]
+    segments: List[Segment] = field(default_factory=list)
+
+
+def dict_delta(before, after):
+    return {k: v for k, v in after.items() if k not in before or before[k] is not v}
+
+
+class IncrementalGeneration:
+    """Remember the output of the binding generator per source file so a rerun
+    only regenerates the files that changed and the files including them
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> import clang.cindex
+    >>> folder = tempfile.mkdtemp()
+    >>> with open(os.path.join(folder, 'types.h'), 'w') as f:
+    ...     _ = f.write('typedef int myint;')
+    >>> with open(os.path.join(folder, 'api.h'), 'w') as f:
+    ...     _ = f.write('#include "types.h"\\nmyint add(myint a, myint b);')
+    >>> with open(os.path.join(folder, 'other.h'), 'w') as f:
+    ...     _ = f.write('float sub(float a, float b);')
+    >>> with open(os.path.join(folder, 'lib.h'), 'w') as f:
+    ...     _ = f.write('#include "api.h"\\n#include "other.h"\\n')
+    >>> tu = clang.cindex.Index.create().parse(os.path.join(folder, 'lib.h'), options=0x01)
+    >>> state = IncrementalGeneration()
+    >>> for name in ('lib.h', 'api.h', 'types.h', 'other.h'):
+    ...     filename = os.path.join(folder, name)
+    ...     state.fragments[filename] = FileFragment(file_signature(filename))
+    >>> state.dirty_files(tu)
+    set()
+
+    Changing a file invalidates every file including it
+
+    >>> with open(os.path.join(folder, 'types.h'), 'w') as f:
+    ...     _ = f.write('typedef long myint;')
+    >>> sorted(os.path.basename(f) for f in state.dirty_files(tu))
+    ['api.h', 'lib.h', 'types.h']
+
+    The files including a header behind its include guard are regenerated as well,
+    the output of the rerun is the same as a fresh run
+
+    >>> from tide.generators.binding_generator import BindingGenerator, unparse
+    >>> with open(os.path.join(folder, 'size.h'), 'w') as f:
+    ...     _ = f.write('#ifndef SIZE_H\\n#define SIZE_H\\n#define SIZE 4\\n#endif\\n')
+    >>> with open(os.path.join(folder, 'buffer.h'), 'w') as f:
+    ...     _ = f.write('#include "size.h"\\nstruct Buffer { float data[SIZE]; };\\n')
+    >>> with open(os.path.join(folder, 'vec.h'), 'w') as f:
+    ...     _ = f.write('#include "size.h"\\n#include "buffer.h"\\n')
+    >>> state = IncrementalGeneration()
+    >>> _ = BindingGenerator.run(os.path.join(folder, 'vec.h'), incremental=state)
+    >>> with open(os.path.join(folder, 'size.h'), 'w') as f:
+    ...     _ = f.write('#ifndef SIZE_H\\n#define SIZE_H\\n#define SIZE 16\\n#endif\\n')
+    >>> rerun = unparse(BindingGenerator.run(os.path.join(folder, 'vec.h'), incremental=state))
+    >>> rerun == unparse(BindingGenerator.run(os.path.join(folder, 'vec.h')))
+    True
+    >>> [line for line in rerun.splitlines() if 'data' in line]
+    ["Buffer._fields_ = [('data', (c_float * 16))]"]
+    """
+
+    def __init__(self):
+        self.fragments: Dict[str, FileFragment] = dict()
+        # macro evaluations of the previous run (MacroGraph)
+        self.macros = None
+        self.dirty: Set[str] = set()
+        self.regenerated: Set[str] = set()
+        self.replayed: Set[str] = set()
+        # number of elements seen so far for each file
+        self.positions = defaultdict(int)
+        # segments of the clean files indexed by their starting position
+        self.starts: Dict[str, Dict[int, Segment]] = dict()
+        # segment currently being recorded and the state of the generator before it
+        self.current: Optional[str] = None
+        self.segment: Optional[Segment] = None
+        self.snapshot = None
+
+    @staticmethod
+    def load(filename) -> 'IncrementalGeneration':
+        state = IncrementalGeneration()
+
+        try:
+            with open(filename, 'rb') as f:
+                data = pickle.load(f)
+
+            state.fragments = data['fragments']
+            state.macros = data['macros']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            log.debug(f'Could not load incremental state {filename}')
+
+        return state
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            pickle.dump(dict(fragments=self.fragments, macros=self.macros), f)
+
+    def dirty_files(self, tu: TranslationUnit) -> Set[str]:
+        """Returns the files that changed since the last run and the files including them"""
+        includers = defaultdict(set)
+        files = {tu.spelling}
+
+        for inclusion in tu.get_includes():
+            files.add(inclusion.include.name)
+
+            if inclusion.source is not None:
+                includers[inclusion.include.name].add(inclusion.source.name)
+
+        # get_includes skips the files included again behind an include guard,
+        # the inclusion directives of the preprocessing record list every include
+        for elem in tu.cursor.get_children():
+            if elem.kind != CursorKind.INCLUSION_DIRECTIVE or elem.location.file is None:
+                continue
+
+            included = elem.get_included_file()
+            if included is not None:
+                files.add(included.name)
+                includers[included.name].add(elem.location.file.name)
+
+        changed = []
+        for filename in files:
+            fragment = self.fragments.get(filename)
+
+            if fragment is None or fragment.signature != file_signature(filename):
+                changed.append(filename)
+
+        dirty = set()
+        while changed:
+            filename = changed.pop()
+
+            if filename in dirty:
+                continue
+
+            dirty.add(filename)
+            changed.extend(includers[filename])
+
+        return dirty
+
+    def start(self, tu: TranslationUnit):
+        self.dirty = self.dirty_files(tu)
+        self.regenerated = set()
+        self.replayed = set()
+        self.positions = defaultdict(int)
+        self.starts = dict()
+        self.current = None
+        log.debug(f'Regenerating {len(self.dirty)} files')
+
+    def is_clean(self, filename) -> bool:
+        return filename is not None and filename not in self.dirty and filename in self.fragments
+
+    def replay(self, gen, filename) -> List[Any]:
+        """Returns the statements generated by the previous run for this element of a clean file"""
+        self.stop(gen)
+
+        position = self.positions[filename]
+        self.positions[filename] += 1
+
+        if filename not in self.replayed:
+            self.replayed.add(filename)
+            self.starts[filename] = {s.start: s for s in self.fragments[filename].segments}
+
+        segment = self.starts[filename].get(position)
+        if segment is None:
+            return []
+
+        segment = copy.deepcopy(segment)
+        gen.type_registry.update(segment.type_registry)
+        gen.definitions.update(segment.definitions)
+        gen.renaming.update(segment.renaming)
+        gen.unsupported_macros.update(segment.unsupported_macros)
+        gen.import_enum = gen.import_enum or segment.import_enum
+        return segment.body
+
+    def record(self, gen, filename):
+        """Record the contributions of this element of ``filename``"""
+        position = self.positions[filename]
+        self.positions[filename] += 1
+
+        if filename == self.current and self.segment is not None:
+            return
+
+        self.stop(gen)
+
+        if filename is None:
+            return
+
+        if filename not in self.regenerated:
+            self.regenerated.add(filename)
+            self.fragments[filename] = FileFragment(file_signature(filename))
+
+        self.current = filename
+        self.segment = Segment(position)
+        self.fragments[filename].segments.append(self.segment)
+        self.snapshot = (
+            dict(gen.type_registry),
+            dict(gen.definitions),
+            dict(gen.renaming),
+            set(gen.unsupported_macros),
+            gen.import_enum,
+        )
+
+    def stop(self, gen):
+        if self.segment is None:
+            return
+
+        type_registry, definitions, renaming, unsupported, import_enum = self.snapshot
+        segment = self.segment
+        # copy so the passes running after the generator do not modify our records
+        segment.body, segment.type_registry, segment.definitions, segment.renaming = copy.deepcopy((
+            segment.body,
+            dict_delta(type_registry, gen.type_registry),
+            dict_delta(definitions, gen.definitions),
+            dict_delta(renaming, gen.renaming),
+        ))
+        segment.unsupported_macros = gen.unsupported_macros - unsupported
+        segment.import_enum = gen.import_enum and not import_enum
+
+        self.current = None
+        self.segment = None
+        self.snapshot = None
+
+    def append(self, statements):
+        if self.segment is not None:
+            self.segment.body.extend(statements)
@@ -0,0 +1,310 @@
+import copy
+from dataclasses import dataclass
+import logging
+import operator
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from tide.generators.clang_utils import CachedToken
+from tide.generators.operator_precedence import UnsupportedExpression
+import tide.generators.nodes as T
+
+log = logging.getLogger('TIDE')
+
+
+integer_operators = {
+    T.Add: operator.add,
+    T.Sub: operator.sub,
+    T.Mult: operator.mul,
+    T.Mod: operator.mod,
+    T.LShift: operator.lshift,
+    T.RShift: operator.rshift,
+    T.BitOr: operator.or_,
+    T.BitAnd: operator.and_,
+    T.BitXor: operator.xor,
+}
+
+integer_unary_operators = {
+    T.USub: operator.neg,
+    T.UAdd: operator.pos,
+    T.Invert: operator.invert,
+}
+
+# refuse to fold 1 << 100000
+MAX_SHIFT = 128
+
+
+def fold_integer(node, values: Dict[str, int] = None) -> Optional[int]:
+    """Compute the value of an integer expression, returns None if the expression is not an integer constant
+
+    Examples
+    --------
+    >>> fold_integer(T.BinOp(T.Constant(1), T.LShift(), T.Constant(4)))
+    16
+    >>> fold_integer(T.BinOp(T.Name('A'), T.BitOr(), T.Constant(2)), dict(A=1))
+    3
+    >>> fold_integer(T.BinOp(T.Constant(1), T.Div(), T.Constant(2))) is None
+    True
+    >>> fold_integer(T.BinOp(T.Constant(-7), T.Mod(), T.Constant(2))) is None
+    True
+    """
+    if isinstance(node, T.Expr):
+        node = node.value
+
+    if isinstance(node, T.Constant):
+        # bool is an int
+        if type(node.value) is int:
+            return node.value
+        return None
+
+    if isinstance(node, T.Name):
+        if values is None:
+            return None
+        return values.get(node.id)
+
+    if isinstance(node, T.UnaryOp):
+        fun = integer_unary_operators.get(type(node.op))
+        operand = fold_integer(node.operand, values)
+
+        if fun is None or operand is None:
+            return None
+
+        return fun(operand)
+
+    if isinstance(node, T.BinOp):
+        fun = integer_operators.get(type(node.op))
+        if fun is None:
+            return None
+
+        left = fold_integer(node.left, values)
+        if left is None:
+            return None
+
+        right = fold_integer(node.right, values)
+        if right is None:
+            return None
+
+        if fun is operator.lshift and right > MAX_SHIFT:
+            return None
+
+        # python floors the remainder and shifts of negative values are not portable in C
+        if fun in (operator.mod, operator.lshift, operator.rshift) and (left < 0 or right < 0):
+            return None
+
+        try:
+            return fun(left, right)
+        except (ValueError, ZeroDivisionError):
+            return None
+
+    return None
+
+
+@dataclass
+class MacroEvaluation:
+    """Result of the evaluation of a macro"""
+    supported: bool = True
+    body: Any = None
+    # value of macros evaluating to an integer constant
+    value: Optional[int] = None
+
+
+class MacroGraph:
+    """Dependencies between the macros of a translation unit.
+
+    Macros are evaluated on demand, the macros they use are always evaluated first
+    so supporting a macro does not depend on the order the macros were encountered in.
+    A macro using an unsupported macro, or part of a cycle, is unsupported.
+    Macros evaluating to an integer constant are folded to their value.
+
+    When the graph of the previous run is given, the evaluation of the macros that did not change,
+    and whose dependencies did not change, is reused.
+
+    Examples
+    --------
+    >>> from tide.generators.binding_generator import parse_macro, parse_macro2
+    >>> from tide.generators.clang_utils import parse_clang, no_builtin, compact_tokens
+    >>> tu, index = parse_clang('#define B (A | 2)\\n#define A 1\\n#define C (B << D)\\n')
+    >>> graph = MacroGraph()
+    >>> for macro in no_builtin(tu.cursor.get_children()):
+    ...     graph.add(*parse_macro(compact_tokens(macro.get_tokens())))
+    >>> graph.dependencies('C')
+    ['B']
+    >>> graph.topological_order()
+    ['A', 'B', 'C']
+
+    ``D`` is not a macro, ``C`` cannot be folded
+
+    >>> parse = lambda name, args, body: parse_macro2(name, args, body)
+    >>> graph.evaluate('B', parse).value
+    3
+    >>> graph.evaluate('C', parse).value is None
+    True
+    >>> graph.is_forward_reference('B')
+    True
+    """
+
+    def __init__(self, previous: 'MacroGraph' = None):
+        # name -> (arguments, body) spellings
+        self.signatures: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = dict()
+        # name -> (name, arguments, body) tokens
+        self.tokens: Dict[str, Tuple[CachedToken, List[CachedToken], List[CachedToken]]] = dict()
+        # name -> position of the definition
+        self.positions: Dict[str, int] = dict()
+        self.deps: Dict[str, List[str]] = dict()
+        self.results: Dict[str, MacroEvaluation] = dict()
+        # macros defined more than once, only the first definition is in the graph
+        self.redefined: Set[str] = set()
+        # macros evaluated again during this run
+        self.changed: Set[str] = set()
+        self.previous = previous
+        self.evaluating: Set[str] = set()
+
+    def __getstate__(self):
+        # only the evaluations are needed by the next run
+        return dict(signatures=self.signatures, deps=self.deps, results=self.results)
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
+    def add(self, name: CachedToken, args: List[CachedToken], body: List[CachedToken]):
+        key = name.spelling
+
+        if key in self.signatures:
+            self.redefined.add(key)
+            return
+
+        self.signatures[key] = (tuple(a.spelling for a in args), tuple(b.spelling for b in body))
+        self.tokens[key] = (name, args, body)
+        self.positions[key] = len(self.positions)
+
+    def matches(self, name: CachedToken, args: List[CachedToken], body: List[CachedToken]) -> bool:
+        """Returns true if this definition is the one known by the graph"""
+        return self.signatures.get(name.spelling) == (
+            tuple(a.spelling for a in args), tuple(b.spelling for b in body))
+
+    def dependencies(self, name) -> List[str]:
+        deps = self.deps.get(name)
+
+        if deps is None:
+            args, body = self.signatures[name]
+            deps = []
+
+            for spelling in body:
+                if spelling != name and spelling not in args and spelling in self.signatures and spelling not in deps:
+                    deps.append(spelling)
+
+            self.deps[name] = deps
+
+        return deps
+
+    def is_forward_reference(self, name) -> bool:
+        """Returns true if the macro uses a macro that is defined after it"""
+        position = self.positions[name]
+        return any(self.positions[dep] > position for dep in self.dependencies(name))
+
+    def topological_order(self) -> List[str]:
+        """Returns the macros ordered so that every macro comes after the macros it uses,
+        macros that are part of a cycle are left out
+        """
+        order = []
+        state = dict()
+
+        def visit(name):
+            status = state.get(name)
+            if status is not None:
+                return status
+
+            # visiting
+            state[name] = False
+
+            for dep in self.dependencies(name):
+                if not visit(dep):
+                    return False
+
+            state[name] = True
+            order.append(name)
+            return True
+
+        for name in self.signatures:
+            visit(name)
+
+        return order
+
+    def is_reusable(self, name) -> bool:
+        previous = self.previous
+
+        if previous is None or name not in previous.results:
+            return False
+
+        if previous.signatures.get(name) != self.signatures[name]:
+            return False
+
+        deps = self.dependencies(name)
+        if previous.deps.get(name) != deps:
+            return False
+
+        return not any(dep in self.changed for dep in deps)
+
+    def evaluate(self, name, parse: Callable) -> MacroEvaluation:
+        """Evaluate a macro and the macros it depends on
+
+        Parameters
+        ----------
+        parse: Callable[[name, args, body], expression]
+            parse the tokens of a macro into a python expression, raise UnsupportedExpression on failure
+        """
+        result = self.results.get(name)
+        if result is not None:
+            return result
+
+        # cycle
+        if name in self.evaluating:
+            return MacroEvaluation(supported=False)
+
+        self.evaluating.add(name)
+        try:
+            results = [self.evaluate(dep, parse) for dep in self.dependencies(name)]
+
+            if self.is_reusable(name):
+                result = copy.deepcopy(self.previous.results[name])
+            else:
+                self.changed.add(name)
+                result = self._evaluate(name, results, parse)
+
+            self.results[name] = result
+        finally:
+            self.evaluating.discard(name)
+
+        return result
+
+    def evaluate_definition(self, name: CachedToken, args, body, parse: Callable) -> MacroEvaluation:
+        """Evaluate a definition that is not part of the graph, for example the redefinition of a macro"""
+        results = []
+        for spelling in {b.spelling for b in body}:
+            if spelling != name.spelling and spelling in self.signatures:
+                results.append(self.evaluate(spelling, parse))
+
+        if not all(r.supported for r in results):
+            return MacroEvaluation(supported=False)
+
+        try:
+            return MacroEvaluation(supported=True, body=parse(name, args, body))
+        except UnsupportedExpression:
+            return MacroEvaluation(supported=False)
+
+    def _evaluate(self, name, results: List[MacroEvaluation], parse: Callable) -> MacroEvaluation:
+        if not all(r.supported for r in results):
+            return MacroEvaluation(supported=False)
+
+        macro, args, body = self.tokens[name]
+        try:
+            expr = parse(macro, args, body)
+        except UnsupportedExpression:
+            return MacroEvaluation(supported=False)
+
+        value = None
+        if len(args) == 0:
+            values = {dep: self.results[dep].value for dep in self.dependencies(name)}
+            value = fold_integer(expr, {k: v for k, v in values.items() if v is not None})
+
+        return MacroEvaluation(supported=True, body=expr, value=value)
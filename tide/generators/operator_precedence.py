@@ -3,6 +3,7 @@ import logging
 from clang.cindex import Token, TokenKind
 
 import tide.generators.nodes as T
+from tide.generators.clang_utils import compact_tokens
 from tide.generators.debug import show_elem, d
 
 log = logging.getLogger(__name__)
@@ -161,7 +162,10 @@ class TokenParser:
 
     """
     def __init__(self, tokens, definitions, registry, rename):
-        self.tokens = tokens
+        # read the spelling and kind of libclang tokens once
+        self.tokens = compact_tokens(tokens)
+        # formatting the debug messages is not free, only do it if they are going to be shown
+        self.debug = log.isEnabledFor(logging.DEBUG)
         # for tok in tokens:
         #     if tok.spelling != '\\':
         #         self.tokens.append(tok)
@@ -204,7 +208,8 @@ class TokenParser:
 
     def parse_unary(self, depth):
         tok = self.peek()
-        log.debug(f'{d(depth)} parse_unary {tok.kind} {tok.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_unary {tok.kind} {tok.spelling}')
 
         op = tok
         self.next()
@@ -222,7 +227,8 @@ class TokenParser:
 
     def parse_expression(self, depth=0):
         tok = self.peek()
-        log.debug(f'{d(depth)} parse_expression {tok.kind} {tok.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_expression {tok.kind} {tok.spelling}')
 
         if tok.spelling == '\\\n{':
             body = []
@@ -276,14 +282,16 @@ class TokenParser:
 
     def parse_cast(self, cast_expr, depth):
         tok = self.peek()
-        log.debug(f'{d(depth)} parse_cast {tok.kind} {tok.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_cast {tok.kind} {tok.spelling}')
 
         expr = self.parse_expression(depth + 1)
         return T.Call(cast_expr, [expr])
 
     def parse_primary(self, depth):
         tok = self.peek()
-        log.debug(f'{d(depth)} parse_primary {tok.kind} {tok.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_primary {tok.kind} {tok.spelling}')
 
         # this can be a cast or a call
         # cast means that lhs is a type
@@ -362,7 +370,8 @@ class TokenParser:
 
             return v
 
-        log.debug(f'{d(depth)} parse_keyword {tok.kind} {tok_spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_keyword {tok.kind} {tok_spelling}')
 
         if tok.spelling in self.unsupported_keywords:
             raise UnsupportedExpression()
@@ -398,7 +407,8 @@ class TokenParser:
         return tok_spelling
 
     def parse_call(self, expr, depth):
-        log.debug(f'{d(depth)} parse_call {expr}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_call {expr}')
 
         args = []
 
@@ -442,7 +452,8 @@ class TokenParser:
         return 0
 
     def parse_literal(self, tok: Token, depth):
-        log.debug(f'{d(depth)} parse_literal {tok.kind} {tok.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_literal {tok.kind} {tok.spelling}')
         val = None
 
         # 3243212132u
@@ -464,7 +475,8 @@ class TokenParser:
     def parse_expression_1(self, lhs, min_precedence, depth):
         lookahead = self.peek()
         precedence = fetch_precedence(lookahead.spelling)
-        log.debug(f'{d(depth)} parse_expression_1 {lhs} {lookahead.kind} {lookahead.spelling}')
+        if self.debug:
+            log.debug(f'{d(depth)} parse_expression_1 {lhs} {lookahead.kind} {lookahead.spelling}')
 
         while lookahead and precedence is not None and precedence >= min_precedence:
             op = lookahead
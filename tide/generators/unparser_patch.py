@@ -19,7 +19,11 @@ def patch(Unparser):
     return Unparser
 
 
+# patch once, patching on every call would nest the wrappers until the recursion limit is hit
+PatchedUnparser = patch(Unparser)
+
+
 def unparse(tree):
     v = cStringIO()
-    patch(Unparser)(tree, file=v)
+    PatchedUnparser(tree, file=v)
     return v.getvalue()
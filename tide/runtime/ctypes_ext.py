@@ -23,3 +23,81 @@ PRIs64 = "lld"
 def enumeration(cls=None):
     """Annotate the class as an enumeration because we could not use Enum"""
     return cls
+
+
+def _element_type(pointer, ctype=None):
+    if ctype is not None:
+        return ctype
+
+    # POINTER(c_float) -> c_float, void pointers are viewed as bytes
+    return getattr(type(pointer), '_type_', None) if not isinstance(pointer, c_void_p) else c_ubyte
+
+
+def _array(pointer, length, ctype=None):
+    ctype = _element_type(pointer, ctype)
+
+    if ctype is None or isinstance(ctype, str):
+        ctype = c_ubyte
+
+    if not pointer:
+        raise ValueError('cannot view a NULL pointer')
+
+    return cast(pointer, POINTER(ctype * length)).contents
+
+
+_NATIVE_FORMATS = set('cbB?hHiIlLqQfd')
+
+
+def pointer_view(pointer, length: int, ctype=None) -> memoryview:
+    """Returns a memoryview over the ``length`` elements pointed by ``pointer`` without copying them.
+    The view writes through to the C memory and is only valid as long as the memory is.
+
+    Examples
+    --------
+    >>> data = (c_float * 3)(1, 2, 3)
+    >>> view = pointer_view(cast(data, POINTER(c_float)), 3)
+    >>> view.tolist()
+    [1.0, 2.0, 3.0]
+    >>> view[0] = 4
+    >>> data[0]
+    4.0
+    """
+    array = _array(pointer, length, ctype)
+    view = memoryview(array)
+
+    # ctypes uses explicit byte order formats (<f) that memoryview cannot index,
+    # simple types are cast to their native format
+    code = getattr(array._type_, '_type_', None)
+    if isinstance(code, str) and code in _NATIVE_FORMATS:
+        view = view.cast('B').cast(code)
+
+    return view
+
+
+def pitched_view(pointer, rows: int, pitch: int) -> memoryview:
+    """Returns a 2D memoryview of ``rows`` rows of ``pitch`` bytes (i.e. the pixels of a surface)
+
+    Examples
+    --------
+    >>> pixels = (c_ubyte * 6)(*range(6))
+    >>> pitched_view(cast(pixels, c_void_p), 2, 3).tolist()
+    [[0, 1, 2], [3, 4, 5]]
+    """
+    return memoryview(_array(pointer, rows * pitch, c_ubyte)).cast('B').cast('B', (rows, pitch))
+
+
+def as_array(pointer, shape, ctype=None):
+    """Returns a NumPy array sharing the memory pointed by ``pointer``, requires NumPy"""
+    try:
+        import numpy
+    except ImportError as err:
+        raise ImportError('as_array requires numpy') from err
+
+    if isinstance(shape, int):
+        shape = (shape,)
+
+    count = 1
+    for dim in shape:
+        count *= dim
+
+    return numpy.ctypeslib.as_array(_array(pointer, count, ctype)).reshape(shape)
@@ -1,11 +1,17 @@
 """DLL wrapper"""
+import atexit
+import json
 import os
+import struct
 import sys
 import warnings
+import weakref
 
-from ctypes import CDLL
+from ctypes import CDLL, POINTER, Structure, byref, c_char_p, c_int, c_void_p
 from ctypes.util import find_library
 
+from tide.utils.cache import cache_dir
+
 
 # Prints warning without stack or line info
 def prettywarn(msg, warntype):
@@ -19,14 +25,107 @@ def prettywarn(msg, warntype):
     warnings.showwarning = original
 
 
-__all__ = ["DLL", "nullfunc"]
+__all__ = ["DLL", "LazyFunction", "nullfunc"]
+
+
+# (libnames, path, platform) -> (signature, libraries)
+_findlib_cache = dict()
+
+
+def _search_signature(path=None):
+    """Modification time of the places searched for libraries, a new library cannot be found
+    without one of them changing
+    """
+    folders = []
+    if path and path.lower() != "system":
+        folders.extend(str.split(path, os.pathsep))
+
+    if sys.platform == "win32":
+        folders.extend(os.getenv("PATH", "").split(os.pathsep))
+    elif sys.platform == "darwin":
+        folders.extend(os.getenv("DYLD_LIBRARY_PATH", "").split(os.pathsep))
+        folders.extend(["/usr/local/lib", "/usr/lib"])
+    else:
+        # find_library reads the ldconfig cache
+        folders.append("/etc/ld.so.cache")
+        folders.extend(os.getenv("LD_LIBRARY_PATH", "").split(os.pathsep))
+
+    signature = []
+    for folder in folders:
+        if not folder:
+            continue
+
+        try:
+            signature.append([folder, os.stat(folder).st_mtime_ns])
+        except OSError:
+            signature.append([folder, None])
+
+    return signature
+
+
+def _load_findlib_cache(filename):
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def _save_findlib_cache(filename, key, signature, results):
+    cache = _load_findlib_cache(filename)
+    cache[key] = dict(signature=signature, libraries=results)
+
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = f'{filename}.{os.getpid()}'
+
+        with open(tmp, 'w') as f:
+            json.dump(cache, f)
+
+        os.replace(tmp, filename)
+    except OSError:
+        pass
 
 
-def _findlib(libnames, path=None):
+def _findlib(libnames, path=None, persist=None):
     """Finds libraries and returns them in a list, with libraries found in the directory
     optionally specified by 'path' being first (taking precedence) and libraries found in system
     search paths following.
+
+    The result is cached in process and, when ``persist`` is true, on disk so the system search
+    paths are not queried again (``find_library`` spawns subprocesses on Linux).
+    The cache is invalidated as soon as one of the searched folders changes.
+    ``persist`` defaults to the ``TIDE_LIBRARY_CACHE`` environment variable being set.
     """
+    if persist is None:
+        persist = bool(os.getenv("TIDE_LIBRARY_CACHE"))
+
+    key = json.dumps([list(libnames), path, sys.platform])
+    signature = _search_signature(path)
+
+    cached = _findlib_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return list(cached[1])
+
+    filename = cache_dir('findlib.json')
+    if persist:
+        entry = _load_findlib_cache(filename).get(key)
+
+        if entry is not None and entry.get('signature') == signature:
+            results = entry['libraries']
+            _findlib_cache[key] = (signature, results)
+            return list(results)
+
+    results = _search_libraries(libnames, path)
+    _findlib_cache[key] = (signature, results)
+
+    if persist:
+        _save_findlib_cache(filename, key, signature, results)
+
+    return list(results)
+
+
+def _search_libraries(libnames, path=None):
 
     platform = sys.platform
     if platform == "win32":
@@ -72,6 +171,125 @@ def _findlib(libnames, path=None):
     return results
 
 
+# ELF constants used to read the dynamic symbol table
+_ELF_MAGIC = b'\x7fELF'
+_SHT_DYNSYM = 11
+_SHN_UNDEF = 0
+_STB_GLOBAL = 1
+_STB_WEAK = 2
+
+
+def _elf_symbols(libfile):
+    """Returns the names of the symbols defined in the dynamic symbol table of an ELF library,
+    None if the file is not an ELF library or the table could not be read.
+
+    Examples
+    --------
+    >>> _elf_symbols(__file__) is None
+    True
+    """
+    try:
+        with open(libfile, 'rb') as f:
+            ident = f.read(16)
+            if len(ident) < 16 or ident[:4] != _ELF_MAGIC:
+                return None
+
+            is64 = ident[4] == 2
+            endian = '<' if ident[5] == 1 else '>'
+
+            if is64:
+                header = struct.Struct(endian + 'HHIQQQIHHHHHH')
+                section = struct.Struct(endian + 'IIQQQQIIQQ')
+                symbol = struct.Struct(endian + 'IBBHQQ')
+            else:
+                header = struct.Struct(endian + 'HHIIIIIHHHHHH')
+                section = struct.Struct(endian + 'IIIIIIIIII')
+                symbol = struct.Struct(endian + 'IIIBBH')
+
+            _, _, _, _, _, shoff, _, _, _, _, shentsize, shnum, _ = header.unpack(f.read(header.size))
+            if shoff == 0 or shnum == 0:
+                return None
+
+            f.seek(shoff)
+            table = f.read(shentsize * shnum)
+            sections = [section.unpack_from(table, i * shentsize) for i in range(shnum)]
+
+            def read_section(sec):
+                # sh_offset and sh_size are at the same place for both classes
+                f.seek(sec[4])
+                return f.read(sec[5])
+
+            for sec in sections:
+                if sec[1] != _SHT_DYNSYM:
+                    continue
+
+                symbols = read_section(sec)
+                strings = read_section(sections[sec[6]])
+                names = set()
+
+                for offset in range(0, len(symbols) - symbol.size + 1, symbol.size):
+                    fields = symbol.unpack_from(symbols, offset)
+
+                    if is64:
+                        name, info, _, shndx, _, _ = fields
+                    else:
+                        name, _, _, info, _, shndx = fields
+
+                    if shndx == _SHN_UNDEF or (info >> 4) not in (_STB_GLOBAL, _STB_WEAK):
+                        continue
+
+                    end = strings.find(b'\0', name)
+                    names.add(strings[name:end].decode('utf-8', 'replace'))
+
+                return names
+
+    except (OSError, struct.error, IndexError):
+        return None
+
+    return None
+
+
+class _LinkMap(Structure):
+    # leading fields of struct link_map (link.h)
+    _fields_ = [('l_addr', c_void_p), ('l_name', c_char_p)]
+
+
+_RTLD_DI_LINKMAP = 2
+
+
+def _library_path(dll):
+    """Returns the path of a loaded library, None if it cannot be found.
+    On Linux ``find_library`` returns a soname (``libm.so.6``) which is not a file we can read,
+    the path the dynamic loader picked is read from its link map instead
+
+    Examples
+    --------
+    >>> os.path.isfile(_library_path(CDLL(find_library('c'))))
+    True
+    """
+    name = dll._name
+    if name and os.path.dirname(name) and os.path.isfile(name):
+        return name
+
+    try:
+        dlinfo = CDLL(None).dlinfo
+    except (AttributeError, OSError, TypeError):
+        return None
+
+    dlinfo.argtypes = [c_void_p, c_int, c_void_p]
+    dlinfo.restype = c_int
+
+    linkmap = POINTER(_LinkMap)()
+    if dlinfo(dll._handle, _RTLD_DI_LINKMAP, byref(linkmap)) != 0 or not linkmap:
+        return None
+
+    path = linkmap.contents.l_name
+    if not path:
+        return None
+
+    return os.fsdecode(path)
+
+
 class DLLWarning(Warning):
     pass
 
@@ -82,14 +300,70 @@ def lazy_function_error(exception):
     return raise_error
 
 
+class LazyFunction(object):
+    """Placeholder for a C function that is only resolved the first time it is called.
+    Once resolved it replaces itself inside the namespace it was bound in so following
+    calls go straight to the ctypes function.
+    """
+    __slots__ = ('_dll', '_namespace', '_funcname', '_args', '_returns', '_func')
+
+    def __init__(self, dll, namespace, funcname, args=None, returns=None):
+        self._dll = dll
+        self._namespace = namespace
+        self._funcname = funcname
+        self._args = args
+        self._returns = returns
+        self._func = None
+
+    def resolve(self):
+        if self._func is not None:
+            return self._func
+
+        func = getattr(self._dll._dll, self._funcname, None)
+
+        if not func:
+            raise ValueError(f"Could not find function '{self._funcname}' in {self._dll.libfile}")
+
+        func.argtypes = self._args or None
+        func.restype = self._returns
+        self._func = func
+
+        if self._namespace is not None and self._namespace.get(self._funcname) is self:
+            self._namespace[self._funcname] = func
+
+        return func
+
+    def __call__(self, *args):
+        return self.resolve()(*args)
+
+    def __getattr__(self, item):
+        return getattr(self.resolve(), item)
+
+    def __repr__(self):
+        return f'<LazyFunction {self._funcname}>'
+
+
+def _report_missing_at_exit(ref):
+    # the exit handler only holds a weak reference, a collected DLL has nothing left to report
+    dll = ref()
+    if dll is not None:
+        dll.report_missing()
+
+
 class DLL(object):
     """Function wrapper around the different DLL functions. Do not use or
     instantiate this one directly from your user code.
     """
 
-    def __init__(self, libinfo, libnames, path=None, env_override=None):
+    def __init__(self, libinfo, libnames, path=None, env_override=None, lazy=False, bulk=False):
         self._dll = None
         self._libname = libinfo
+        self._lazy = lazy
+        # missing functions are collected and reported once by ``report_missing``
+        self._bulk = bulk
+        self._symbols = None
+        self._symbols_read = False
+        self.missing = []
 
         foundlibs = _findlib(libnames, path)
 
@@ -118,6 +392,10 @@ class DLL(object):
         if path is not None and sys.platform in ("win32",) and path in self._libfile:
             os.environ["PATH"] = "%s;%s" % (path, os.environ["PATH"])
 
+        if bulk:
+            # functions missing since the last report are still reported if the caller does not
+            atexit.register(_report_missing_at_exit, weakref.ref(self))
+
     def bind_function(self, funcname, args=None, returns=None, **kwargs):
         """Binds the passed argument and return value types to the specified
         function. If the version of the loaded library is older than the
@@ -135,11 +413,18 @@ class DLL(object):
 
             kwargs: used to hold arbitrary data from the c-binding generator
         """
-        func = getattr(self._dll, funcname, None)
+        func = None
+        if not self._bulk or self.has_function(funcname):
+            func = getattr(self._dll, funcname, None)
 
         if not func:
             v = ValueError(f"Could not find function '{funcname}' in {self._libfile}")
-            warnings.warn(str(v))
+
+            if self._bulk:
+                self.missing.append(funcname)
+            else:
+                warnings.warn(str(v))
+
             return lazy_function_error(v)
 
         if not args:
@@ -149,6 +434,80 @@ class DLL(object):
         func.restype = returns
         return func
 
+    def bind_functions(self, functions):
+        """Binds many functions in one pass, missing functions are reported in a single warning
+
+        Args:
+            functions (Iterable[Tuple]): the ``(funcname, args, returns)`` of the functions to bind
+
+        Returns:
+            Dict[str, function]: the bound functions by name
+        """
+        bulk, self._bulk = self._bulk, True
+
+        try:
+            bound = {spec[0]: self.bind_function(*spec) for spec in functions}
+        finally:
+            self._bulk = bulk
+
+        self.report_missing()
+        return bound
+
+    def report_missing(self):
+        """Emits a single warning listing the functions that could not be found since the last report
+
+        Returns:
+            List[str]: the names of the missing functions
+        """
+        missing, self.missing = self.missing, []
+
+        if missing:
+            names = ', '.join(missing[:10])
+            if len(missing) > 10:
+                names += f', ... ({len(missing) - 10} more)'
+
+            warnings.warn(f"Could not find {len(missing)} functions in {self._libfile}: {names}", DLLWarning)
+
+        return missing
+
+    @property
+    def symbols(self):
+        """Set[str]: the names exported by the library, None if its symbol table cannot be read"""
+        if not self._symbols_read:
+            libfile = _library_path(self._dll) or self._libfile
+            self._symbols = _elf_symbols(libfile)
+            self._symbols_read = True
+
+        return self._symbols
+
+    def has_function(self, funcname):
+        """Returns true if the library exports the function, this is a set lookup when the
+        symbol table of the library can be read (ELF libraries) and a symbol lookup otherwise
+        """
+        symbols = self.symbols
+
+        if symbols is not None:
+            return funcname in symbols
+
+        return bool(getattr(self._dll, funcname, None))
+
+    def lazy_binder(self, namespace=None):
+        """Returns a ``bind_function`` that defers symbol lookup and prototype assignment
+        to the first call of the function. When the DLL was not created as lazy the regular
+        ``bind_function`` is returned.
+
+        Args:
+            namespace (dict, optional): the module globals the functions are bound in,
+                resolved functions replace their placeholder inside it.
+        """
+        if not self._lazy:
+            return self.bind_function
+
+        def bind_function(funcname, args=None, returns=None, **kwargs):
+            return LazyFunction(self, namespace, funcname, args, returns)
+
+        return bind_function
+
     @property
     def libfile(self):
         """str: The filename of the loaded library."""
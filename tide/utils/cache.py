@@ -0,0 +1,22 @@
+import os
+
+
+def cache_dir(*names) -> str:
+    """Returns the folder used to persist tide caches between runs
+
+    The folder follows the XDG convention, ``TIDE_CACHE_DIR`` can be used to override it.
+
+    Examples
+    --------
+    >>> os.environ['TIDE_CACHE_DIR'] = '/tmp/tide'
+    >>> cache_dir('tu')
+    '/tmp/tide/tu'
+    >>> _ = os.environ.pop('TIDE_CACHE_DIR')
+    """
+    root = os.getenv('TIDE_CACHE_DIR')
+
+    if root is None:
+        base = os.getenv('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+        root = os.path.join(base, 'tide')
+
+    return os.path.join(root, *names)
@@ -74,16 +74,61 @@ class Trie:
             self._insert(n)
 
     def _insert(self, name: str, previous_char=None) -> None:
-        self.count += 1
+        node = self
+        node.count += 1
 
-        if name == '':
-            self.leaf = True
-            return
+        for c in name:
+            if previous_char and not previous_char.isalnum():
+                node.alphanum_boundary = True
+
+            node = node.chars[c]
+            node.count += 1
+            previous_char = c
+
+        node.leaf = True
+
+    def _walk(self, immediate=False) -> Iterable[str]:
+        """Iterate over the words of the Trie using an explicit stack,
+        the words of the children come first, in insertion order, followed by the word ending here
+        """
+        # the stack holds the tries left to visit and the words to yield once their children are done
+        stack = [(self, '')]
+
+        while stack:
+            item = stack.pop()
+
+            if item.__class__ is str:
+                yield item
+                continue
+
+            trie, prefix = item
+            chars = trie.chars
 
-        if previous_char and not previous_char.isalnum():
-            self.alphanum_boundary = True
+            # follow the chains of single characters without going through the stack
+            while len(chars) == 1 and not trie.leaf:
+                c, child = next(iter(chars.items()))
 
-        self.chars[name[0]]._insert(name[1:], previous_char=name[0])
+                if immediate and not (child.count == 1 or child.leaf):
+                    chars = None
+                    break
+
+                trie, prefix, chars = child, prefix + c, child.chars
+
+            if chars is None:
+                continue
+
+            if trie.leaf:
+                if not chars:
+                    yield prefix
+                    continue
+
+                stack.append(prefix)
+
+            for c, child in reversed(chars.items()):
+                if immediate and not (child.count == 1 or child.leaf):
+                    continue
+
+                stack.append((child, prefix + c))
 
     def words(self) -> Iterable[str]:
         """Returns all possible words after that point
@@ -98,34 +143,19 @@ class Trie:
         >>> sorted(list(t.words()))
         ['', 'd']
         """
-        for c, trie in self.chars.items():
-            partial = trie.words()
-
-            for p in partial:
-                yield c + p
-
-        if self.leaf:
-            yield ''
+        return self._walk()
 
     def immediate_words(self):
         """Returns all the available words that we know for sure (no recursive branching)"""
-        for c, trie in self.chars.items():
-            if trie.count == 1 or trie.leaf:
-                partial = trie.immediate_words()
-
-                for p in partial:
-                    yield c + p
-
-        if self.leaf:
-            yield ''
+        return self._walk(immediate=True)
 
     def is_bucket_item(self):
         return self.count == 1 or self.leaf
 
     def is_bucket(self):
         """A bucket is a Trie with more that one leaves"""
-        for c, t in self.chars.items():
-            if not t.is_bucket_item():
+        for t in self.chars.values():
+            if not (t.count == 1 or t.leaf):
                 return False
 
         return True
@@ -159,14 +189,17 @@ class Trie:
             SDL_HAT_DOWN
         """
 
-        if self.is_bucket():
-            yield Bucket(prefix, self)
-        else:
-            for c, t in self.chars.items():
-                buckets = t.buckets(prefix + c)
+        stack = [(self, prefix)]
+
+        while stack:
+            trie, prefix = stack.pop()
+
+            if trie.is_bucket():
+                yield Bucket(prefix, trie)
+                continue
 
-                for b in buckets:
-                    yield b
+            for c, t in reversed(trie.chars.items()):
+                stack.append((t, prefix + c))
 
     def redundant_prefix(self):
         """Show how often a prefix is reused
@@ -190,35 +223,77 @@ class Trie:
         >>> sorted(list(names.redundant_prefix()), key=lambda x: x[1])
         [(3, 'SDL_BUTTON_'), (2, 'SDL_HAT_'), (2, 'read_')]
         """
-        counts = dict()
-        for w in set(self._redundant_prefix()):
-            trie = self.find(w)
-            counts[w] = trie.count
-
-        for w, c in counts.items():
-            if c > 1 and len(w) > 2:
-                yield c, w
+        for count, prefix in self._redundant_prefix():
+            if count > 1 and len(prefix) > 2:
+                yield count, prefix
 
     def _redundant_prefix(self, previous_count=None):
-        for c, t in self.chars.items():
-            if (previous_count and t.count == previous_count) or t.count > 1:
-                words = list(self.chars[c]._redundant_prefix(previous_count))
-
-                for w in words:
-                    yield c + w
-
-                if len(words) == 0 and self.alphanum_boundary:
-                    yield ''
-
-            elif self.alphanum_boundary:
-                yield ''
+        """Returns the (count, prefix) of the tries ending on an alphanumeric boundary after which the words diverge.
+        The tries shared by more than one word are listed parent first using an explicit stack
+        then processed children first, prefixes are only built for the tries that hold one
+        """
+        # tries shared by more than one word, the index of their parent and the char leading to them
+        tries = [self]
+        parents = [-1]
+        chars = ['']
+        # number of shared children and whether some children are not shared
+        shared = [0]
+        unshared = [False]
+        stack = [0]
+
+        while stack:
+            i = stack.pop()
+            children = tries[i].chars
+
+            for c, t in children.items():
+                if t.count > 1 or (previous_count and t.count == previous_count):
+                    stack.append(len(tries))
+                    tries.append(t)
+                    parents.append(i)
+                    chars.append(c)
+                    shared.append(0)
+                    unshared.append(False)
+                    shared[i] += 1
+
+            unshared[i] = shared[i] < len(children)
+
+        # number of shared children holding a prefix
+        held = [0] * len(tries)
+        found = []
+
+        for i in range(len(tries) - 1, -1, -1):
+            has_prefix = held[i] > 0
+
+            if (unshared[i] or held[i] < shared[i]) and tries[i].alphanum_boundary:
+                found.append(i)
+                has_prefix = True
+
+            if has_prefix and i > 0:
+                held[parents[i]] += 1
+
+        result = []
+        for i in found:
+            count = tries[i].count
+            prefix = []
+
+            while i > 0:
+                prefix.append(chars[i])
+                i = parents[i]
+
+            result.append((count, ''.join(reversed(prefix))))
+
+        return result
 
     def dumps(self, d=0, c=''):
-        i = ' ' * d
-        print(f'|{i} `{c}` (bucket: {self.is_bucket()}) (count: {self.count}) (len: {len(self.chars)}) (boundary: {self.alphanum_boundary})')
+        stack = [(self, d, c)]
+
+        while stack:
+            trie, d, c = stack.pop()
+            i = ' ' * d
+            print(f'|{i} `{c}` (bucket: {trie.is_bucket()}) (count: {trie.count}) (len: {len(trie.chars)}) (boundary: {trie.alphanum_boundary})')
 
-        for c, t in self.chars.items():
-            t.dumps(d + 1, c)
+            for c, t in reversed(list(trie.chars.items())):
+                stack.append((t, d + 1, c))
 
 
 @dataclass
@@ -229,3 +304,397 @@ class Bucket:
     def words(self):
         for w in self.trie.immediate_words():
             yield self.prefix + w
+
+
+def _last_boundary(label: str) -> int:
+    """Returns the largest k < len(label) such as label[k - 1] is not alphanumeric, 0 if there is none"""
+    for k in range(len(label) - 1, 0, -1):
+        if not label[k - 1].isalnum():
+            return k
+
+    return 0
+
+
+class _RadixNode:
+    """Node of a ``RadixTrie``, the edge leading to the node holds a string segment"""
+
+    __slots__ = ('label', 'children', 'count', 'leaf', 'boundary', 'bucket', 'redundant')
+
+    def __init__(self, label: str, count=0, leaf=False):
+        self.label = label
+        # first char of the child label -> child
+        self.children = None
+        self.count = count
+        self.leaf = leaf
+        # position of the last alphanumeric boundary inside the label
+        self.boundary = _last_boundary(label)
+        # cached statistics, see ``RadixTrie._refresh``
+        self.bucket = False
+        self.redundant = False
+
+    def relabel(self, label: str):
+        self.label = label
+        self.boundary = _last_boundary(label)
+
+
+class RadixTrie:
+    """Path compressed Trie with the same API as ``Trie``.
+    Edges hold string segments instead of a single character and the nodes cache statistics
+    about their subtree so ``buckets`` and ``redundant_prefix`` do not need to walk every character.
+    All the operations are iterative so long identifiers do not hit the recursion limit.
+
+    Sub tries returned by ``find`` are read only views, they can point inside an edge.
+
+    Examples
+    --------
+    >>> trie = RadixTrie()
+    >>> trie.insert('SDL_HAT_UP', 'SDL_HAT_DOWN', 'SDL_Init')
+    >>> trie.find('SDL_').count
+    3
+    >>> 'SDL_Init' in trie, 'SDL_' in trie
+    (True, False)
+    >>> sorted(trie.suggest('SDL_HAT_'))
+    ['SDL_HAT_DOWN', 'SDL_HAT_UP']
+    >>> sorted(trie.redundant_prefix())
+    [(2, 'SDL_HAT_'), (3, 'SDL_')]
+    >>> [list(bucket.words()) for bucket in trie.buckets()]
+    [['SDL_HAT_UP', 'SDL_HAT_DOWN'], ['SDL_Init']]
+    """
+
+    __slots__ = ('_root', '_node', '_offset', '_prefix', '_stats')
+
+    def __init__(self):
+        self._root = self
+        self._node = _RadixNode('')
+        self._offset = 0
+        # full word leading to this trie
+        self._prefix = ''
+        # [(count, prefix)] redundant prefixes of the whole trie, None when they need to be computed again
+        self._stats = None
+
+    def _view(self, node: _RadixNode, offset: int, prefix: str) -> 'RadixTrie':
+        trie = object.__new__(RadixTrie)
+        trie._root = self._root
+        trie._node = node
+        trie._offset = offset
+        trie._prefix = prefix
+        trie._stats = None
+        return trie
+
+    def _is_explicit(self) -> bool:
+        return self._offset == len(self._node.label)
+
+    @property
+    def leaf(self) -> bool:
+        return self._is_explicit() and self._node.leaf
+
+    @property
+    def count(self) -> int:
+        return self._node.count
+
+    @property
+    def alphanum_boundary(self) -> bool:
+        node, offset = self._node, self._offset
+
+        if offset == 0:
+            return False
+
+        if offset < len(node.label):
+            return not node.label[offset - 1].isalnum()
+
+        return bool(node.children) and not node.label[-1].isalnum()
+
+    def _positions(self):
+        """Returns the (char, node, offset) of the positions one character after this one"""
+        node, offset = self._node, self._offset
+
+        if offset < len(node.label):
+            return [(node.label[offset], node, offset + 1)]
+
+        if not node.children:
+            return []
+
+        return [(c, child, 1) for c, child in node.children.items()]
+
+    @property
+    def chars(self):
+        return {c: self._view(node, offset, self._prefix + c) for c, node, offset in self._positions()}
+
+    def _refresh(self):
+        """Compute the cached statistics of every node in a single pass"""
+        root = self._root
+        if root._stats is not None:
+            return
+
+        # pre-order, children are visited before their parent when iterating in reverse
+        order = []
+        stack = [(root._node, '')]
+        while stack:
+            node, prefix = stack.pop()
+            order.append((node, prefix))
+
+            if node.children:
+                for child in node.children.values():
+                    stack.append((child, prefix + child.label))
+
+        stats = []
+        for node, prefix in reversed(order):
+            boundary = bool(node.children) and node.label != '' and not node.label[-1].isalnum()
+            bucket = True
+            redundant = False
+            emit = False
+
+            for child in (node.children.values() if node.children else ()):
+                # the character after node is a bucket item
+                if not (child.count == 1 or (len(child.label) == 1 and child.leaf)):
+                    bucket = False
+
+                if child.count > 1:
+                    child_redundant = child.redundant
+
+                    # the edge leading to the child can hold a prefix
+                    if not child_redundant and child.boundary:
+                        stats.append((child.count, prefix + child.label[:child.boundary]))
+                        child_redundant = True
+
+                    if child_redundant:
+                        redundant = True
+                    else:
+                        emit = True
+                else:
+                    emit = True
+
+            if boundary and emit:
+                stats.append((node.count, prefix))
+                redundant = True
+
+            node.bucket = bucket
+            node.redundant = redundant
+
+        root._stats = stats
+
+    def find(self, name: str) -> Optional['RadixTrie']:
+        """Returns the Trie found for the given word"""
+        node, offset = self._node, self._offset
+        label = node.label
+        i = 0
+        size = len(name)
+
+        while i < size:
+            if offset == len(label):
+                child = node.children.get(name[i]) if node.children else None
+                if child is None:
+                    return None
+
+                node, offset, label = child, 0, child.label
+
+            end = i + len(label) - offset
+
+            # the name goes past the edge
+            if end <= size:
+                if offset == 0:
+                    if not name.startswith(label, i):
+                        return None
+
+                elif not name.startswith(label[offset:], i):
+                    return None
+
+                i = end
+                offset = len(label)
+                continue
+
+            # the name stops inside the edge
+            if not label.startswith(name[i:], offset):
+                return None
+
+            offset += size - i
+            break
+
+        return self._view(node, offset, self._prefix + name)
+
+    def __contains__(self, item):
+        t = self.find(item)
+        return t is not None and t.leaf
+
+    def suggest(self, name: str, full_words=True) -> Iterable[str]:
+        """Suggest full words to complete the partial string provided"""
+        trie = self.find(name)
+
+        if trie is None:
+            return
+
+        for p in trie.words():
+            if not full_words:
+                yield p
+            else:
+                yield name + p
+
+    def insert(self, *names) -> None:
+        """Insert new names into the Trie, only the root of the Trie can be modified"""
+        if self._root is not self:
+            raise TypeError('sub tries of a RadixTrie are read only')
+
+        for name in names:
+            self._insert(name)
+
+        self._stats = None
+
+    def _insert(self, name: str):
+        node = self._node
+        node.count += 1
+        i = 0
+        size = len(name)
+
+        while i < size:
+            c = name[i]
+            child = node.children.get(c) if node.children else None
+
+            if child is None:
+                if node.children is None:
+                    node.children = dict()
+
+                node.children[c] = _RadixNode(name[i:], 1, True)
+                return
+
+            label = child.label
+            if name.startswith(label, i):
+                matched = len(label)
+            else:
+                matched = 1
+                limit = min(len(label), size - i)
+
+                while matched < limit and label[matched] == name[i + matched]:
+                    matched += 1
+
+                # split the edge, the new node replaces the child in place to keep the insertion order
+                middle = _RadixNode(label[:matched], child.count)
+                child.relabel(label[matched:])
+                middle.children = {child.label[0]: child}
+                node.children[c] = middle
+                child = middle
+
+            child.count += 1
+            node = child
+            i += matched
+
+        node.leaf = True
+
+    def _walk(self, node: _RadixNode, prefix: str, immediate=False) -> Iterable[str]:
+        """Iterate over the words of the subtree in the same order as ``Trie.words``"""
+        stack = [(node, prefix, False)]
+
+        while stack:
+            node, prefix, done = stack.pop()
+
+            if done:
+                yield prefix
+                continue
+
+            if node.leaf:
+                stack.append((node, prefix, True))
+
+            if not node.children:
+                continue
+
+            for child in reversed(list(node.children.values())):
+                # only follow the characters that are bucket items
+                if immediate and child.count != 1 and not (len(child.label) == 1 and child.leaf):
+                    continue
+
+                stack.append((child, prefix + child.label, False))
+
+    def words(self) -> Iterable[str]:
+        """Returns all possible words after that point
+
+        Examples
+        --------
+        >>> trie = RadixTrie()
+        >>> trie.insert('abc', 'abcd')
+        >>> list(trie.words())
+        ['abcd', 'abc']
+        """
+        node, offset = self._node, self._offset
+        return self._walk(node, node.label[offset:])
+
+    def immediate_words(self):
+        """Returns all the available words that we know for sure (no recursive branching)"""
+        node, offset = self._node, self._offset
+        rest = node.label[offset:]
+
+        # the characters left on the edge are bucket items if the subtree holds a single word
+        # or if only the last one is left and the node is a leaf
+        if len(rest) > 1 and node.count != 1:
+            return iter(())
+
+        if len(rest) == 1 and node.count != 1 and not node.leaf:
+            return iter(())
+
+        return self._walk(node, rest, immediate=node.count != 1)
+
+    def is_bucket_item(self):
+        return self.count == 1 or self.leaf
+
+    def is_bucket(self):
+        """A bucket is a Trie with more that one leaves"""
+        node, offset = self._node, self._offset
+
+        if offset < len(node.label):
+            return node.count == 1 or (offset + 1 == len(node.label) and node.leaf)
+
+        self._refresh()
+        return node.bucket
+
+    def buckets(self, prefix=''):
+        """Returns bucket of words that matches
+        This is used to group macro constant together inside an enum
+        """
+        self._refresh()
+        stack = [(self._node, self._offset, prefix)]
+
+        while stack:
+            node, offset, prefix = stack.pop()
+            label = node.label
+
+            if offset < len(label):
+                # first bucket along the edge
+                if node.count == 1:
+                    yield Bucket(prefix, self._view(node, offset, prefix))
+                    continue
+
+                if node.leaf and offset < len(label) - 1:
+                    prefix += label[offset:-1]
+                    yield Bucket(prefix, self._view(node, len(label) - 1, prefix))
+                    continue
+
+                if node.leaf and offset == len(label) - 1:
+                    yield Bucket(prefix, self._view(node, offset, prefix))
+                    continue
+
+                prefix += label[offset:]
+
+            if node.bucket:
+                yield Bucket(prefix, self._view(node, len(label), prefix))
+                continue
+
+            for child in reversed(list(node.children.values())):
+                stack.append((child, 1, prefix + child.label[0]))
+
+    def redundant_prefix(self):
+        """Show how often a prefix is reused"""
+        self._refresh()
+        start = len(self._prefix)
+
+        for count, prefix in self._root._stats:
+            if count > 1 and len(prefix) - start > 2 and prefix.startswith(self._prefix):
+                yield count, prefix[start:]
+
+    def dumps(self, d=0, c=''):
+        stack = [(self, d, c)]
+
+        while stack:
+            trie, d, c = stack.pop()
+            i = ' ' * d
+            print(f'|{i} `{c}` (bucket: {trie.is_bucket()}) (count: {trie.count}) (len: {len(trie.chars)}) (boundary: {trie.alphanum_boundary})')
+
+            for c, t in reversed(list(trie.chars.items())):
+                stack.append((t, d + 1, c))